@@ -4,6 +4,9 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny  # ✅ import
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
+from cart.guest import read_guest_token
+from cart.owners import CartOwner
+from cart.stores import cart_store
 from accounts.serializers.auth_serializers import (
     RegisterSerializer,
     LoginSerializer,
@@ -71,6 +74,11 @@ class LoginView(APIView):
         if serializer.is_valid():
             user = serializer.validated_data["user"]
 
+            # Fold a guest cart (X-Cart-Token / cart_token) into the user's cart
+            guest_token = read_guest_token(request)
+            if guest_token:
+                cart_store.merge(CartOwner(token=guest_token), user)
+
             # Generate JWT tokens
             refresh = RefreshToken.for_user(user)
 
@@ -0,0 +1,36 @@
+import secrets
+
+from django.core import signing
+
+# Guest clients send the signed token back in this header; new tokens are
+# returned in it too
+GUEST_TOKEN_HEADER = "X-Cart-Token"
+GUEST_TOKEN_SALT = "cart.guest-token"
+
+
+def new_guest_token():
+    """Raw token stored on Cart.token (32 characters)."""
+    return secrets.token_hex(16)
+
+
+def sign_guest_token(token):
+    return signing.Signer(salt=GUEST_TOKEN_SALT).sign(token)
+
+
+def unsign_guest_token(value):
+    """The raw token from a signed value, or None if it is missing or forged."""
+    if not value:
+        return None
+    try:
+        return signing.Signer(salt=GUEST_TOKEN_SALT).unsign(value)
+    except signing.BadSignature:
+        return None
+
+
+def read_guest_token(request):
+    """Raw guest token sent with a request (header, or `cart_token` in the body)."""
+    value = request.headers.get(GUEST_TOKEN_HEADER)
+    data = getattr(request, "data", None)
+    if not value and hasattr(data, "get"):
+        value = data.get("cart_token")
+    return unsign_guest_token(value)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cart.stores import cart_store
+
+
+class Command(BaseCommand):
+    help = "Background worker: persist write-behind carts (CART_STORE=cache) to the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Dirty-log entries per pass")
+        parser.add_argument("--once", action="store_true", help="Drain the dirty log and exit")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Idle poll interval (seconds)")
+
+    def handle(self, *args, **options):
+        while True:
+            read, written = cart_store.flush_pending(options["batch_size"])
+            if read:
+                self.stdout.write(f"Flushed {written} cart(s) from {read} write(s)")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS("Cart write log drained"))
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from cart.services.guest_carts import prune_guest_carts
+
+
+class Command(BaseCommand):
+    help = "Delete guest carts untouched for GUEST_CART_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.GUEST_CART_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted = 0
+        for count in prune_guest_carts(cutoff, options["batch_size"]):
+            deleted += count
+            self.stdout.write(f"Deleted {count} guest cart(s)")
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} guest cart(s)"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from cart.services.reservations import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Release expired cart stock holds back to available stock"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        released = 0
+        for count in release_expired_holds(options["batch_size"]):
+            released += count
+            self.stdout.write(f"Released {count} hold(s)")
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired hold(s)"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_alter_cartitem_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='token',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='cart',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('user__isnull', True)), fields=['updated_at'], name='cart_guest_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.CheckConstraint(condition=models.Q(('user__isnull', False), ('token__isnull', False), _connector='OR'), name='cart_has_owner'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0003_guest_carts'),
+        ('gadjet_shop', '0015_product_reserved_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_key', models.CharField(max_length=64)),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='gadjet_shop.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='reservation_expires_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner_key', 'product'), name='reservation_owner_product_uniq')],
+            },
+        ),
+    ]
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.db import models
 from django.db.models import F, Sum, DecimalField, ExpressionWrapper
@@ -10,22 +12,55 @@ class Cart(models.Model):
         settings.AUTH_USER_MODEL,
         related_name="cart",
         on_delete=models.CASCADE,
-        db_index=True
+        db_index=True,
+        null=True,
+        blank=True
     )
+    # Guest carts have no user; clients hold a signed copy of this token
+    # (see cart.guest) and the cart is merged into the user's on login
+    token = models.CharField(max_length=32, unique=True, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(user__isnull=False) | models.Q(token__isnull=False),
+                name="cart_has_owner",
+            ),
+        ]
+        indexes = [
+            # prune_guest_carts scans abandoned guest carts by age
+            models.Index(
+                fields=["updated_at"],
+                name="cart_guest_updated_idx",
+                condition=models.Q(user__isnull=True),
+            ),
+        ]
+
     def __str__(self):
+        if self.user_id is None:
+            return f"Cart (guest {self.token})"
         return f"Cart ({self.user.email})"
 
+    def _prefetched_items(self):
+        """Items loaded by prefetch_related("items"), or None."""
+        return getattr(self, "_prefetched_objects_cache", {}).get("items")
+
     @property
     def total_items(self):
         """Total quantity of items in the cart."""
+        items = self._prefetched_items()
+        if items is not None:
+            return sum(item.quantity for item in items)
         return self.items.aggregate(total=Sum("quantity"))["total"] or 0
 
     @property
     def subtotal(self):
         """Subtotal of the cart (sum of quantity × product price)."""
+        items = self._prefetched_items()
+        if items is not None:
+            return sum((item.subtotal for item in items), Decimal("0"))
         return self.items.aggregate(
             total=Sum(
                 ExpressionWrapper(
@@ -80,3 +115,32 @@ class CartItem(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()  # calls clean() before saving
         super().save(*args, **kwargs)
+
+
+class StockReservation(models.Model):
+    """
+    Stock held for a cart line until expires_at, counted in
+    Product.reserved_stock. Placed and resized on cart writes, turned into
+    a sale at checkout and released by `manage.py release_stock_holds` once
+    expired (see cart.services.reservations).
+    """
+    # CartOwner.key of the cart: "user:<id>" or "guest:<token>"
+    owner_key = models.CharField(max_length=64)
+    product = models.ForeignKey(
+        Product,
+        related_name="reservations",
+        on_delete=models.CASCADE
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner_key", "product"], name="reservation_owner_product_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="reservation_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} × {self.product_id} for {self.owner_key}"
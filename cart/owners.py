@@ -0,0 +1,29 @@
+class CartOwner:
+    """
+    Whose cart a store call is about: a user, or a guest holding a cart
+    token (see cart.guest).
+    """
+
+    def __init__(self, user_id=None, token=None):
+        self.user_id = user_id
+        self.token = token
+
+    @classmethod
+    def for_user(cls, user):
+        return cls(user_id=user.pk)
+
+    @classmethod
+    def from_key(cls, key):
+        kind, _, value = key.partition(":")
+        return cls(user_id=int(value)) if kind == "user" else cls(token=value)
+
+    @property
+    def key(self):
+        return f"user:{self.user_id}" if self.user_id is not None else f"guest:{self.token}"
+
+    @property
+    def lookup(self):
+        """Cart.objects filter / get_or_create kwargs for this owner."""
+        if self.user_id is not None:
+            return {"user_id": self.user_id}
+        return {"token": self.token, "user__isnull": True}
@@ -1,8 +1,12 @@
 from django.conf import settings
 from rest_framework import serializers
 from gadjet_shop.models import Product, ProductImage
+from gadjet_shop.services.variants import variant_urls
 from .models import Cart, CartItem
 
+# Upper bound on operations per POST /cart/batch/
+CART_BATCH_MAX_OPERATIONS = 100
+
 
 class CartItemSerializer(serializers.ModelSerializer):
     qty = serializers.IntegerField(source="quantity", read_only=True)
@@ -36,22 +40,18 @@ class CartItemSerializer(serializers.ModelSerializer):
         """
         Returns a full URL for the hero image or first image of the product.
         """
-        # Get hero image first
-        hero_image = obj.product.images.filter(is_hero=True).first()
+        # Denormalized on Product: hero image, falling back to the first image
+        hero_image = obj.product.hero_image
         if hero_image:
             request = self.context.get("request")
+            # Thumbnail rendition when variants exist
+            responsive = variant_urls(hero_image, request)
+            if responsive and "thumb" in responsive["variants"]:
+                return responsive["variants"]["thumb"]["jpeg"]
             if request:
                 return request.build_absolute_uri(hero_image.image.url)
             return f"{settings.MEDIA_URL}{hero_image.image.name}"
 
-        # Fallback to first image
-        first_image = obj.product.images.first()
-        if first_image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return f"{settings.MEDIA_URL}{first_image.image.name}"
-
         # No image → return placeholder
         return "/assets/images/placeholder.png"
 
@@ -94,3 +94,28 @@ class UpdateCartItemQuantitySerializer(serializers.Serializer):
     Serializer for updating quantity only (PATCH /cart/<id>/update/)
     """
     quantity = serializers.IntegerField(min_value=1)
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """
+    One line of a batch: add to / set / remove a product's quantity.
+    """
+    op = serializers.ChoiceField(choices=["add", "set", "remove"])
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] != "remove" and "quantity" not in attrs:
+            raise serializers.ValidationError({"quantity": "This field is required."})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch cart edits (POST /cart/batch/)
+    """
+    operations = serializers.ListField(
+        child=CartOperationSerializer(),
+        allow_empty=False,
+        max_length=CART_BATCH_MAX_OPERATIONS,
+    )
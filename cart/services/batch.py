@@ -0,0 +1,120 @@
+# cart/services/batch.py
+
+from django.db import transaction
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from cart.services.reservations import StockHoldError, reserve_stock
+from gadjet_shop.models import Product
+
+OPERATIONS = ("add", "set", "remove")
+
+
+class CartBatchError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(error["message"] for error in errors))
+        self.errors = errors
+
+
+def fold_operations(quantities, operations):
+    """
+    Fold operations in order into target quantities per product id: add
+    sums, set replaces, remove drops the line (quantity 0).
+    """
+    quantities = dict(quantities)
+    for operation in operations:
+        product_id = operation["product_id"]
+        if operation["op"] == "add":
+            quantities[product_id] = quantities.get(product_id, 0) + operation["quantity"]
+        elif operation["op"] == "set":
+            quantities[product_id] = operation["quantity"]
+        else:
+            quantities[product_id] = 0
+    return quantities
+
+
+def check_stock(quantities, products):
+    """
+    Raise CartBatchError listing every product whose target quantity is
+    above its stock (or that no longer exists). `products` maps id -> Product.
+    """
+    errors = []
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        product = products.get(product_id)
+        if product is None:
+            if quantity:
+                errors.append({"product_id": product_id, "message": "Product does not exist"})
+        elif quantity > product.stock:
+            errors.append({
+                "product_id": product_id,
+                "message": f"Cannot set quantity of {product.name} to {quantity}. Only {product.stock} available.",
+                "available_stock": product.stock,
+            })
+    if errors:
+        raise CartBatchError(errors)
+
+
+def hold_stock(owner_key, quantities):
+    """
+    Resize the owner's stock holds to the target quantities (see
+    reserve_stock), raising CartBatchError for products that are short.
+    """
+    try:
+        reserve_stock(owner_key, quantities)
+    except StockHoldError as exc:
+        raise CartBatchError(exc.errors)
+
+
+def apply_cart_operations(cart, owner_key, operations):
+    """
+    Apply a list of {"op", "product_id", "quantity"} operations to a cart in
+    one transaction and return the number of lines written.
+
+    Operations are folded into a target quantity per product (see
+    fold_operations). The cart row is locked to serialise batches on the
+    same cart, and every target quantity is held against available stock
+    with conditional UPDATEs (see reserve_stock) before the lines are
+    written, so product rows are never locked up front. Nothing is written
+    if any operation fails; CartBatchError carries one error per product.
+    """
+    product_ids = sorted({operation["product_id"] for operation in operations})
+
+    with transaction.atomic():
+        Cart.objects.select_for_update().get(pk=cart.pk)
+        products = Product.objects.in_bulk(product_ids)
+        items = {
+            item.product_id: item
+            for item in CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+        }
+
+        quantities = fold_operations(
+            {product_id: item.quantity for product_id, item in items.items()}, operations
+        )
+        check_stock(quantities, products)
+        hold_stock(owner_key, {product_id: quantities.get(product_id, 0) for product_id in product_ids})
+
+        created, updated, removed = [], [], []
+        for product_id in product_ids:
+            quantity = quantities.get(product_id, 0)
+            item = items.get(product_id)
+            if item is None:
+                if quantity:
+                    created.append(CartItem(cart=cart, product=products[product_id], quantity=quantity))
+            elif not quantity:
+                removed.append(item.id)
+            elif quantity != item.quantity:
+                item.quantity = quantity
+                updated.append(item)
+
+        if created:
+            CartItem.objects.bulk_create(created)
+        if updated:
+            CartItem.objects.bulk_update(updated, ["quantity"])
+        if removed:
+            CartItem.objects.filter(id__in=removed).delete()
+        if created or updated or removed:
+            # Bulk writes skip the per-item signal that versions the cart
+            Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+
+    return len(created) + len(updated) + len(removed)
@@ -0,0 +1,75 @@
+# cart/services/guest_carts.py
+
+from django.db import transaction
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from cart.owners import CartOwner
+from cart.services.reservations import held_quantities, transfer_holds
+
+
+def merge_guest_cart(token, user):
+    """
+    Fold a guest cart into the user's cart and delete it. Returns the
+    number of lines written.
+
+    Quantities of products in both carts are summed and every merged line
+    is clamped to what is available to the user (stock not held by other
+    carts; lines with nothing left are dropped), then written with one bulk
+    upsert on (cart, product). The guest's stock holds move to the user.
+    The user's cart row is locked so the merge is serialised with other
+    writes to it.
+    """
+    guest, owner = CartOwner(token=token), CartOwner.for_user(user)
+    with transaction.atomic():
+        guest_lines = list(
+            CartItem.objects.filter(cart__token=token, cart__user__isnull=True)
+            .values_list("cart_id", "product_id", "quantity", "product__stock", "product__reserved_stock")
+        )
+        if not guest_lines:
+            Cart.objects.filter(token=token, user__isnull=True).delete()
+            return 0
+
+        cart, _ = Cart.objects.get_or_create(user=user)
+        Cart.objects.select_for_update().get(pk=cart.pk)
+        product_ids = [line[1] for line in guest_lines]
+        existing = dict(
+            CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+            .values_list("product_id", "quantity")
+        )
+        guest_held = held_quantities(guest.key, product_ids, lock=False)
+        user_held = held_quantities(owner.key, product_ids, lock=False)
+
+        merged = []
+        for _, product_id, quantity, stock, reserved in guest_lines:
+            available = max(stock - reserved, 0) + guest_held.get(product_id, 0) + user_held.get(product_id, 0)
+            quantity = min(existing.get(product_id, 0) + quantity, available)
+            if quantity > 0:
+                merged.append(CartItem(cart=cart, product_id=product_id, quantity=quantity))
+        CartItem.objects.bulk_create(
+            merged,
+            update_conflicts=True,
+            unique_fields=["cart", "product"],
+            update_fields=["quantity"],
+        )
+        transfer_holds(guest.key, owner.key, {item.product_id: item.quantity for item in merged})
+        Cart.objects.filter(pk=guest_lines[0][0]).delete()
+        # Bulk writes skip the per-item signal that versions the cart
+        Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+
+    return len(merged)
+
+
+def prune_guest_carts(cutoff, batch_size=1000):
+    """
+    Delete guest carts not touched since `cutoff`, `batch_size` carts per
+    DELETE so each transaction stays short. Yields the carts deleted per batch.
+    """
+    stale = Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff)
+    while True:
+        ids = list(stale.order_by("updated_at").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            Cart.objects.filter(id__in=ids).delete()
+        yield len(ids)
@@ -0,0 +1,243 @@
+# cart/services/reservations.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from cart.models import StockReservation
+from gadjet_shop.cache import bump_catalog_version
+from gadjet_shop.models import Product
+
+
+class StockHoldError(ValueError):
+    def __init__(self, errors):
+        super().__init__("; ".join(error["message"] for error in errors))
+        self.errors = errors
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=settings.CART_HOLD_MINUTES)
+
+
+def held_quantities(owner_key, product_ids, lock=True):
+    """
+    The owner's held quantity per product id. With `lock` the hold rows are
+    locked (FOR UPDATE) so the sweeper skips them until the caller commits.
+    """
+    holds = StockReservation.objects.filter(owner_key=owner_key, product_id__in=list(product_ids))
+    if lock:
+        holds = holds.select_for_update()
+    return dict(holds.values_list("product_id", "quantity"))
+
+
+def available_to(product, held=0):
+    """Units of `product` an owner holding `held` of it can still buy."""
+    return min(product.stock, product.available_stock + held)
+
+
+def per_product(amounts):
+    """CASE expression picking each product's amount from {product_id: amount}."""
+    return Case(
+        *[When(pk=product_id, then=Value(amount)) for product_id, amount in amounts.items()],
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def reserve(amounts):
+    """
+    Take {product_id: quantity} from available-to-sell stock in one
+    conditional UPDATE. Returns the ids that were short; then nothing was
+    taken.
+    """
+    amount = per_product(amounts)
+    with transaction.atomic():
+        updated = (
+            Product.objects
+            .filter(pk__in=list(amounts), stock__gte=F("reserved_stock") + amount)
+            .update(reserved_stock=F("reserved_stock") + amount)
+        )
+        if updated < len(amounts):
+            # All or nothing: undo the products that did fit
+            transaction.set_rollback(True)
+    if updated == len(amounts):
+        return []
+    short = [
+        product_id
+        for product_id, stock, reserved in Product.objects.filter(pk__in=list(amounts))
+        .values_list("id", "stock", "reserved_stock")
+        if stock < reserved + amounts[product_id]
+    ]
+    # A concurrent release may have made room since; still report them all
+    return short or sorted(amounts)
+
+
+def release(amounts):
+    """Give {product_id: quantity} back to available-to-sell stock in one UPDATE."""
+    Product.objects.filter(pk__in=list(amounts)).update(
+        reserved_stock=Greatest(F("reserved_stock") - per_product(amounts), Value(0))
+    )
+
+
+def reserve_stock(owner_key, quantities):
+    """
+    Move the owner's holds to the target cart quantities given as
+    {product_id: quantity}, refreshing their expiry.
+
+    All increases are one conditional UPDATE of Product.reserved_stock
+    that only applies while stock - reserved_stock covers every product,
+    and all decreases one UPDATE giving stock back, so product rows are
+    only locked by those statements. If any product is short nothing
+    changes and StockHoldError lists the short products.
+
+    Like every stock writer (checkout, merges, the sweeper) it locks the
+    hold rows before it updates products, so they cannot deadlock.
+    """
+    with transaction.atomic():
+        held = held_quantities(owner_key, quantities)
+        deltas = {
+            product_id: quantity - held.get(product_id, 0)
+            for product_id, quantity in quantities.items()
+        }
+        increases = {product_id: delta for product_id, delta in deltas.items() if delta > 0}
+        decreases = {product_id: -delta for product_id, delta in deltas.items() if delta < 0}
+
+        short = reserve(increases) if increases else []
+        if short:
+            errors = []
+            for product in Product.objects.filter(id__in=short).order_by("id"):
+                available = available_to(product, held.get(product.id, 0))
+                errors.append({
+                    "product_id": product.id,
+                    "message": (
+                        f"Cannot set quantity of {product.name} to {quantities[product.id]}. "
+                        f"Only {available} available."
+                    ),
+                    "available_stock": available,
+                })
+            raise StockHoldError(errors)
+        if decreases:
+            release(decreases)
+
+        expires_at = hold_expiry()
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(owner_key=owner_key, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                for product_id, quantity in quantities.items()
+                if quantity
+            ],
+            update_conflicts=True,
+            unique_fields=["owner_key", "product"],
+            update_fields=["quantity", "expires_at"],
+        )
+        emptied = [product_id for product_id, quantity in quantities.items() if not quantity]
+        if emptied:
+            StockReservation.objects.filter(owner_key=owner_key, product_id__in=emptied).delete()
+
+
+def transfer_holds(source_key, target_key, limits):
+    """
+    Hand a guest's holds to the user their cart was merged into. For each
+    product in `limits` (the merged line quantities) the guest's and the
+    user's holds are added up and capped at the limit; the excess, and any
+    guest hold on a product that was not merged, goes back to available
+    stock. The user's other holds are left alone.
+    """
+    with transaction.atomic():
+        holds = (
+            StockReservation.objects.select_for_update()
+            .filter(Q(owner_key=source_key) | Q(owner_key=target_key, product_id__in=list(limits)))
+        )
+        totals = {}
+        for product_id, quantity in holds.values_list("product_id", "quantity"):
+            totals[product_id] = totals.get(product_id, 0) + quantity
+        if not totals:
+            return
+
+        expires_at = hold_expiry()
+        kept, excess = [], {}
+        for product_id, total in totals.items():
+            keep = min(total, limits.get(product_id, 0))
+            if total > keep:
+                excess[product_id] = total - keep
+            if keep:
+                kept.append(StockReservation(
+                    owner_key=target_key, product_id=product_id, quantity=keep, expires_at=expires_at,
+                ))
+
+        if excess:
+            release(excess)
+        holds.delete()
+        StockReservation.objects.bulk_create(kept)
+
+
+def consume_holds(owner_key, held, ordered):
+    """
+    Turn the owner's holds into a sale at checkout. `held` comes from
+    held_quantities() in the same transaction and `ordered` maps product
+    ids to the units bought. One conditional UPDATE takes the units bought
+    from stock and the owner's holds from reserved_stock, and only applies
+    while the stock not held by others covers every product. Returns the
+    ids that were short; then nothing changed.
+    """
+    amount = per_product(ordered)
+    hold = per_product({product_id: held.get(product_id, 0) for product_id in ordered})
+    with transaction.atomic():
+        updated = (
+            Product.objects
+            .filter(pk__in=list(ordered), stock__gte=amount)
+            .filter(stock__gte=F("reserved_stock") - hold + amount)
+            .update(
+                stock=F("stock") - amount,
+                reserved_stock=Greatest(F("reserved_stock") - hold, Value(0)),
+                updated_at=timezone.now(),
+            )
+        )
+        if updated < len(ordered):
+            # All or nothing, like reserve()
+            transaction.set_rollback(True)
+    if updated < len(ordered):
+        short = [
+            product.id
+            for product in Product.objects.filter(pk__in=list(ordered))
+            if available_to(product, held.get(product.id, 0)) < ordered[product.id]
+        ]
+        return short or sorted(ordered)
+
+    unsold = {product_id: quantity for product_id, quantity in held.items() if product_id not in ordered}
+    if unsold:
+        release(unsold)
+    StockReservation.objects.filter(owner_key=owner_key, product_id__in=list(held)).delete()
+    # Stock is written with update(), which sends no signals
+    transaction.on_commit(bump_catalog_version)
+    return []
+
+
+def release_expired_holds(batch_size=1000):
+    """
+    Release holds past their expiry, `batch_size` per transaction. Holds
+    being changed by a cart write or checkout are skipped (SKIP LOCKED, so
+    the sweeper never waits) and picked up next run. Yields the holds
+    released per batch.
+    """
+    while True:
+        with transaction.atomic():
+            expired = list(
+                StockReservation.objects
+                .filter(expires_at__lt=timezone.now())
+                .order_by("expires_at")
+                .select_for_update(skip_locked=True)
+                .values_list("id", "product_id", "quantity")[:batch_size]
+            )
+            if not expired:
+                return
+            StockReservation.objects.filter(id__in=[hold_id for hold_id, _, _ in expired]).delete()
+            released = {}
+            for _, product_id, quantity in expired:
+                released[product_id] = released.get(product_id, 0) + quantity
+            release(released)
+        yield len(expired)
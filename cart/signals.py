@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+
+# ------------------------------
+# Cart version (updated_at) follows its items
+# ------------------------------
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def touch_cart_on_item_change(sender, instance, **kwargs):
+    origin = kwargs.get("origin")
+    if origin is not None and getattr(origin, "model", type(origin)) is Cart:
+        # Cascade from deleting the cart itself
+        return
+    Cart.objects.filter(pk=instance.cart_id).update(updated_at=timezone.now())
@@ -0,0 +1,380 @@
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Max, Prefetch, prefetch_related_objects
+from django.dispatch import receiver
+from django.http import Http404
+from django.utils import timezone
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from gadjet_shop.conditional import make_etag
+from gadjet_shop.models import Product
+from .models import Cart, CartItem
+from .owners import CartOwner
+from .services.batch import apply_cart_operations, check_stock, fold_operations, hold_stock
+from .services.guest_carts import merge_guest_cart
+
+
+# ------------------------------
+# Database store (default)
+# ------------------------------
+class DatabaseCartStore:
+    """
+    Carts read and written straight through Cart/CartItem rows.
+    """
+
+    def get(self, owner):
+        """
+        Get or create the owner's cart, annotated with the newest updated_at
+        of its products (for the cart's ETag).
+        """
+        cart = (
+            Cart.objects.filter(**owner.lookup)
+            .annotate(products_updated_at=Max("items__product__updated_at"))
+            .first()
+        )
+        if cart is None:
+            cart, _ = Cart.objects.get_or_create(**owner.lookup)
+            cart.products_updated_at = None
+        return cart
+
+    def validators(self, cart):
+        """
+        ETag / Last-Modified for the cart from its updated_at (bumped on item
+        changes) and the newest updated_at of its products.
+        """
+        last_modified = max(filter(None, [cart.updated_at, cart.products_updated_at]))
+        etag = make_etag("cart", cart.id, cart.updated_at.isoformat(), cart.products_updated_at)
+        return etag, last_modified
+
+    def items(self, cart):
+        """Cart items with products and hero images, loaded in one query."""
+        prefetch_related_objects(
+            [cart],
+            Prefetch("items", queryset=CartItem.objects.select_related("product__hero_image")),
+        )
+        return list(cart.items.all())
+
+    def apply(self, owner, operations):
+        """Apply add/set/remove operations (see apply_cart_operations)."""
+        cart = self.get(owner)
+        apply_cart_operations(cart, owner.key, operations)
+        return cart
+
+    def update_line(self, owner, line_id, operation):
+        """Apply a set/remove operation to a line addressed by its CartItem id."""
+        with transaction.atomic():
+            cart = Cart.objects.select_for_update().filter(**owner.lookup).first()
+            product_id = (
+                CartItem.objects.filter(cart=cart, id=line_id).values_list("product_id", flat=True).first()
+                if cart else None
+            )
+            if product_id is None:
+                raise Http404("No CartItem matches the given query.")
+            apply_cart_operations(cart, owner.key, [{**operation, "product_id": product_id}])
+        return cart
+
+    def flush(self, owner):
+        """Nothing to persist; writes already went to the database."""
+
+    def flush_pending(self, batch_size=100):
+        return 0, 0
+
+    def merge(self, guest, user):
+        """Fold the guest's cart into the user's (see merge_guest_cart)."""
+        return merge_guest_cart(guest.token, user)
+
+
+# ------------------------------
+# Cache store (write-behind)
+# ------------------------------
+class CartBusy(APIException):
+    """Another request kept the cart locked for longer than the lock timeout."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The cart is being updated by another request; try again."
+    default_code = "cart_busy"
+
+
+class CachedCart:
+    """A cart held by CacheCartStore; serializes like Cart."""
+
+    def __init__(self, owner, entry, products):
+        self.owner = owner
+        self.id = entry["cart_id"]
+        self.version = entry["version"]
+        lines = sorted(entry["lines"].items(), key=lambda line: line[1][1], reverse=True)
+        self.items = [
+            CartItem(id=product_id, product=products[product_id], quantity=quantity,
+                     added_at=datetime.fromtimestamp(added_at, tz=dt_timezone.utc))
+            for product_id, (quantity, added_at) in lines
+            if product_id in products
+        ]
+
+    @property
+    def updated_at(self):
+        return datetime.fromtimestamp(self.version, tz=dt_timezone.utc)
+
+    @property
+    def total_items(self):
+        return sum(item.quantity for item in self.items)
+
+    @property
+    def subtotal(self):
+        return sum((item.subtotal for item in self.items), Decimal("0"))
+
+
+class CacheCartStore:
+    """
+    Write-behind carts: the active cart lives in settings.CART_CACHE and
+    reads and writes do not touch Cart/CartItem. Every write appends the
+    owner to a dirty log that `manage.py flush_carts` drains into the
+    database; /cart/validate/ and checkout flush the buyer's cart first.
+    Stock holds (cart.services.reservations) are still placed in the
+    database on every write.
+
+    Line ids are product ids (a cart has one line per product), since a
+    line may not have a CartItem row yet.
+    """
+    key_prefix = "cart"
+    lock_timeout = 5
+
+    @property
+    def cache(self):
+        return caches[settings.CART_CACHE]
+
+    def entry_key(self, owner):
+        return f"{self.key_prefix}:{owner.key}"
+
+    @property
+    def dirty_seq_key(self):
+        return f"{self.key_prefix}:dirty"
+
+    @property
+    def dirty_cursor_key(self):
+        return f"{self.key_prefix}:dirty:flushed"
+
+    def dirty_slot_key(self, seq):
+        return f"{self.key_prefix}:dirty:{seq}"
+
+    def lock_key(self, owner):
+        return f"{self.entry_key(owner)}:lock"
+
+    @contextmanager
+    def lock(self, owner):
+        """
+        Serialise read-modify-write of one cart entry across workers. Yields
+        the lock token. Raises CartBusy if the lock is not free within
+        lock_timeout (an abandoned lock expires by then).
+        """
+        key = self.lock_key(owner)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(key, token, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                raise CartBusy()
+            time.sleep(0.01)
+        try:
+            yield token
+        finally:
+            # Only release our own lock; ours may have expired and been retaken
+            if self.cache.get(key) == token:
+                self.cache.delete(key)
+
+    def read_entry(self, owner):
+        """The cached cart entry, seeded from the database on a miss."""
+        entry = self.cache.get(self.entry_key(owner))
+        if entry is None:
+            entry = self.entry_from_database(owner)
+            if not self.cache.add(self.entry_key(owner), entry, settings.CART_CACHE_TIMEOUT):
+                entry = self.cache.get(self.entry_key(owner)) or entry
+        return entry
+
+    def entry_from_database(self, owner):
+        cart = Cart.objects.filter(**owner.lookup).first()
+        lines = {}
+        if cart is not None:
+            lines = {
+                product_id: (quantity, added_at.timestamp())
+                for product_id, quantity, added_at
+                in cart.items.values_list("product_id", "quantity", "added_at")
+            }
+        version = time.time()
+        return {
+            "cart_id": cart.id if cart else None,
+            "version": version,
+            "flushed": version,
+            "lines": lines,
+        }
+
+    def build(self, owner, entry, products=None):
+        if products is None:
+            products = Product.objects.select_related("hero_image").in_bulk(list(entry["lines"]))
+        return CachedCart(owner, entry, products)
+
+    def get(self, owner):
+        return self.build(owner, self.read_entry(owner))
+
+    def validators(self, cart):
+        products_updated_at = max((item.product.updated_at for item in cart.items), default=None)
+        last_modified = max(filter(None, [cart.updated_at, products_updated_at]))
+        etag = make_etag("cart", "cache", cart.owner.key, cart.version, products_updated_at)
+        return etag, last_modified
+
+    def items(self, cart):
+        return cart.items
+
+    def apply(self, owner, operations):
+        with self.lock(owner) as token:
+            return self.apply_locked(owner, token, self.read_entry(owner), operations)
+
+    def update_line(self, owner, line_id, operation):
+        with self.lock(owner) as token:
+            entry = self.read_entry(owner)
+            try:
+                product_id = int(line_id)
+            except (TypeError, ValueError):
+                product_id = None
+            if product_id not in entry["lines"]:
+                raise Http404("No CartItem matches the given query.")
+            return self.apply_locked(owner, token, entry, [{**operation, "product_id": product_id}])
+
+    def apply_locked(self, owner, token, entry, operations):
+        lines = entry["lines"]
+        touched = {operation["product_id"] for operation in operations}
+        quantities = fold_operations(
+            {product_id: quantity for product_id, (quantity, _) in lines.items()}, operations
+        )
+        products = Product.objects.select_related("hero_image").in_bulk(list(set(lines) | touched))
+        targets = {product_id: quantities[product_id] for product_id in touched}
+        check_stock(targets, products)
+        hold_stock(owner.key, targets)
+
+        now = time.time()
+        entry = {
+            **entry,
+            "version": now,
+            "lines": {
+                product_id: (quantity, lines[product_id][1] if product_id in lines else now)
+                for product_id, quantity in quantities.items()
+                if quantity
+            },
+        }
+        if self.cache.get(self.lock_key(owner)) != token:
+            # The lock expired during the stock checks and may be held by
+            # another writer now; it would overwrite or be overwritten
+            raise CartBusy()
+        self.cache.set(self.entry_key(owner), entry, settings.CART_CACHE_TIMEOUT)
+        self.mark_dirty(owner)
+        return self.build(owner, entry, products)
+
+    def mark_dirty(self, owner):
+        """Append the owner to the dirty log drained by flush_pending()."""
+        self.cache.add(self.dirty_seq_key, 0, None)
+        seq = self.cache.incr(self.dirty_seq_key)
+        self.cache.set(self.dirty_slot_key(seq), owner.key, settings.CART_CACHE_TIMEOUT)
+
+    def flush(self, owner):
+        with self.lock(owner):
+            return self.persist(owner)
+
+    def persist(self, owner):
+        """
+        Write a cached cart to Cart/CartItem: one upsert for its lines and
+        one delete for lines no longer in it. Skipped when nothing changed
+        since the last flush. Returns True when rows were written.
+        """
+        entry = self.cache.get(self.entry_key(owner))
+        if entry is None or entry["flushed"] == entry["version"]:
+            return False
+
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(**owner.lookup)
+            product_ids = set(
+                Product.objects.filter(id__in=list(entry["lines"])).values_list("id", flat=True)
+            )
+            CartItem.objects.bulk_create(
+                [
+                    CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                    for product_id, (quantity, _) in entry["lines"].items()
+                    if product_id in product_ids
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["quantity"],
+            )
+            CartItem.objects.filter(cart=cart).exclude(product_id__in=product_ids).delete()
+            Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+
+        entry = {**entry, "cart_id": cart.id, "flushed": entry["version"]}
+        self.cache.set(self.entry_key(owner), entry, settings.CART_CACHE_TIMEOUT)
+        return True
+
+    def flush_pending(self, batch_size=100):
+        """
+        Persist carts from the next `batch_size` dirty-log slots. Returns
+        (slots read, carts written); (0, 0) once the log is drained.
+        """
+        end = self.cache.get(self.dirty_seq_key, 0)
+        start = self.cache.get(self.dirty_cursor_key, 0)
+        if start > end:
+            # The counter was evicted and restarted
+            start = 0
+        stop = min(end, start + batch_size)
+        if stop == start:
+            return 0, 0
+
+        slots = self.cache.get_many([self.dirty_slot_key(seq) for seq in range(start + 1, stop + 1)])
+        written = 0
+        for key in set(slots.values()):
+            owner = CartOwner.from_key(key)
+            try:
+                with self.lock(owner):
+                    written += self.persist(owner)
+            except CartBusy:
+                # The lock holder writes the cart and logs it again, or flushes it itself
+                continue
+        self.cache.set(self.dirty_cursor_key, stop, None)
+        self.cache.delete_many(list(slots))
+        return stop - start, written
+
+    def merge(self, guest, user):
+        """
+        Persist both carts, merge them in the database and drop the cached
+        entries so the next read is seeded from the merged rows.
+        """
+        owner = CartOwner.for_user(user)
+        with self.lock(owner), self.lock(guest):
+            self.persist(guest)
+            self.persist(owner)
+            merged = merge_guest_cart(guest.token, user)
+            self.cache.delete_many([self.entry_key(guest), self.entry_key(owner)])
+        return merged
+
+
+class CartStore(LazyObject):
+    """
+    Cart storage backend chosen by settings.CART_STORE. Resolved lazily so
+    override_settings() swaps it too.
+    """
+
+    def _setup(self):
+        self._wrapped = import_string(settings.CART_STORE)()
+
+
+cart_store = CartStore()
+
+
+@receiver(setting_changed)
+def reset_cart_store(*, setting, **kwargs):
+    if setting == "CART_STORE":
+        cart_store._wrapped = empty
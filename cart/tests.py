@@ -1,3 +1,484 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from unittest import mock
+
+from gadjet_shop.models import Category, Product, ProductImage
+from .serializers import CartItemSerializer
+from .models import Cart, CartItem, StockReservation
+from .guest import sign_guest_token
+from .owners import CartOwner
+from .services.reservations import consume_holds
+from .stores import CacheCartStore, cart_store
+
+User = get_user_model()
+
+
+def create_products(count, stock=10):
+    category, _ = Category.objects.get_or_create(name="Gadgets")
+    start = Product.objects.count()
+    return [
+        Product.objects.create(
+            name=f"Gadget {start + i}", description="", brand="Acme",
+            category=category, price=1000 + i, stock=stock,
+        )
+        for i in range(count)
+    ]
+
+
+class CartTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="shopper@example.com", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+
+
+# ------------------------------
+# Conditional GET on the cart
+# ------------------------------
+class CartConditionalGetTests(CartTestCase):
+    def test_cart_not_modified_until_items_or_products_change(self):
+        product = create_products(1)[0]
+        CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+        url = reverse("cart-list")
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totalQty"], 2)
+
+        etag = response["ETag"]
+        product.price = 500
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+# ------------------------------
+# Cart item images
+# ------------------------------
+class CartItemImageTests(CartTestCase):
+    def test_product_image_reads_denormalized_hero(self):
+        product = create_products(1)[0]
+        ProductImage.objects.create(product=product, image="products/side.jpg", order=0)
+        ProductImage.objects.create(product=product, image="products/hero.jpg", is_hero=True, order=1)
+        item = CartItem.objects.select_related("product__hero_image").get(
+            pk=CartItem.objects.create(cart=self.cart, product=product).pk
+        )
+
+        with self.assertNumQueries(0):
+            image = CartItemSerializer(item).data["product_image"]
+
+        self.assertIn("hero.jpg", image)
+
+    def test_placeholder_without_images(self):
+        item = CartItem.objects.create(cart=self.cart, product=create_products(1)[0])
+
+        self.assertEqual(
+            CartItemSerializer(item).data["product_image"], "/assets/images/placeholder.png"
+        )
+
+
+# ------------------------------
+# Cart read query budget
+# ------------------------------
+class CartQueryBudgetTests(CartTestCase):
+    def fill_cart(self, count):
+        products = create_products(count)
+        for product in products:
+            ProductImage.objects.create(product=product, image=f"products/{product.id}.jpg", is_hero=True)
+        CartItem.objects.bulk_create(
+            CartItem(cart=self.cart, product=product, quantity=2) for product in products
+        )
+        return products
+
+    def test_cart_read_queries_do_not_grow_with_items(self):
+        url = reverse("cart-list")
+        # Cart with ETag inputs, then items joined to products and hero images
+        for count in (1, 100):
+            with self.subTest(items=count):
+                CartItem.objects.filter(cart=self.cart).delete()
+                products = self.fill_cart(count)
+
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["items"]), count)
+                self.assertEqual(response.data["totalQty"], 2 * count)
+                self.assertEqual(
+                    response.data["totalPrice"],
+                    f"{sum(2 * product.price for product in products):.2f}",
+                )
+                self.assertTrue(all(".jpg" in item["product_image"] for item in response.data["items"]))
+
+    def test_totals_fall_back_to_aggregates_without_prefetch(self):
+        self.fill_cart(3)
+        cart = Cart.objects.get(pk=self.cart.pk)
+
+        self.assertEqual(cart.total_items, 6)
+        self.assertEqual(cart.subtotal, 2 * (1000 + 1001 + 1002))
+
+
+# ------------------------------
+# Batch cart edits
+# ------------------------------
+class CartBatchTests(CartTestCase):
+    url = reverse("cart-batch")
+
+    def post(self, operations):
+        return self.client.post(self.url, {"operations": operations}, format="json")
+
+    def test_operations_applied_in_order(self):
+        kept, changed, dropped, added = create_products(4)
+        CartItem.objects.create(cart=self.cart, product=kept, quantity=1)
+        CartItem.objects.create(cart=self.cart, product=changed, quantity=1)
+        CartItem.objects.create(cart=self.cart, product=dropped, quantity=1)
+        etag = self.client.get(reverse("cart-list"))["ETag"]
+
+        response = self.post([
+            {"op": "set", "product_id": changed.id, "quantity": 5},
+            {"op": "add", "product_id": changed.id, "quantity": 2},
+            {"op": "remove", "product_id": dropped.id},
+            {"op": "add", "product_id": added.id, "quantity": 3},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity")),
+            {kept.id: 1, changed.id: 7, added.id: 3},
+        )
+        self.assertEqual(response.data["totalQty"], 11)
+        response = self.client.get(reverse("cart-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_stock_failure_writes_nothing(self):
+        ok, short = create_products(2, stock=3)
+
+        response = self.post([
+            {"op": "add", "product_id": ok.id, "quantity": 1},
+            {"op": "add", "product_id": short.id, "quantity": 2},
+            {"op": "add", "product_id": short.id, "quantity": 2},
+            {"op": "add", "product_id": 999999, "quantity": 1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [error["product_id"] for error in response.data["errors"]], [short.id, 999999]
+        )
+        self.assertEqual(response.data["errors"][0]["available_stock"], 3)
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+
+    def test_quantity_required_except_for_remove(self):
+        product = create_products(1)[0]
+
+        response = self.post([{"op": "set", "product_id": product.id}])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_grow_with_lines(self):
+        # Locks, item lookup, one stock-hold UPDATE and upsert, bulk insert,
+        # cart touch, then the cart read (plus savepoints)
+        for count in (1, 20):
+            with self.subTest(lines=count):
+                CartItem.objects.filter(cart=self.cart).delete()
+                products = create_products(count)
+                with self.assertNumQueries(16):
+                    response = self.post([
+                        {"op": "add", "product_id": product.id, "quantity": 1}
+                        for product in products
+                    ])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data["totalQty"], count)
+
+
+# ------------------------------
+# Cache-backed cart store
+# ------------------------------
+@override_settings(CART_STORE="cart.stores.CacheCartStore")
+class CacheCartStoreTests(CartTestCase):
+    def flush(self):
+        call_command("flush_carts", "--once", stdout=StringIO())
+
+    def test_writes_stay_in_cache_until_flushed(self):
+        first, second = create_products(2)
+        CartItem.objects.create(cart=self.cart, product=first, quantity=1)
+
+        response = self.client.post(reverse("cart-add"), {"product_id": second.id, "quantity": 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["totalQty"], 3)
+        # Line ids are product ids
+        line = next(item for item in response.data["items"] if item["product"] == first.id)
+        response = self.client.patch(reverse("cart-update-item", args=[line["id"]]), {"quantity": 4})
+        self.assertEqual(response.data["totalQty"], 6)
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity")),
+            {first.id: 1},
+        )
+
+        self.flush()
+
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart=self.cart).values_list("product_id", "quantity")),
+            {first.id: 4, second.id: 2},
+        )
+        # Drained dirty-log slots are dropped
+        self.assertEqual(cache.get_many(["cart:dirty:1", "cart:dirty:2"]), {})
+
+    def test_reads_skip_cart_tables(self):
+        product = create_products(1)[0]
+        self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 1})
+        url = reverse("cart-list")
+
+        # Products (with hero images) only
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data["totalQty"], 1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_stock_checked_against_products(self):
+        product = create_products(1, stock=2)[0]
+
+        response = self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 3})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(cart_store.get(CartOwner.for_user(self.user)).items, [])
+
+    def test_remove_and_validate_persist_cart(self):
+        kept, dropped = create_products(2)
+        CartItem.objects.create(cart=self.cart, product=kept, quantity=1)
+        CartItem.objects.create(cart=self.cart, product=dropped, quantity=1)
+
+        self.client.delete(reverse("cart-remove-item", args=[dropped.id]))
+        response = self.client.get(reverse("cart-validate"))
+
+        self.assertTrue(response.data["valid"])
+        self.assertEqual(
+            list(CartItem.objects.filter(cart=self.cart).values_list("product_id", flat=True)), [kept.id]
+        )
+        self.assertEqual(self.client.delete(reverse("cart-remove-item", args=[dropped.id])).status_code, 404)
+
+    def test_busy_cart_is_rejected_without_breaking_the_lock(self):
+        product = create_products(1)[0]
+        owner = CartOwner.for_user(self.user)
+        lock_key = f"cart:{owner.key}:lock"
+        cache.set(lock_key, "other-request", 60)
+
+        with mock.patch.object(CacheCartStore, "lock_timeout", 0.05):
+            response = self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 1})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(cache.get(lock_key), "other-request")
+        self.assertEqual(cart_store.get(owner).items, [])
+
+        # A lock that expired and was retaken stays with its new holder
+        cache.delete(lock_key)
+        with cart_store.lock(owner):
+            cache.set(lock_key, "next-request", 60)
+        self.assertEqual(cache.get(lock_key), "next-request")
+
+    def test_write_is_dropped_when_the_lock_was_lost(self):
+        product = create_products(1)[0]
+        owner = CartOwner.for_user(self.user)
+        lock_key = f"cart:{owner.key}:lock"
+
+        def expire_and_retake(*args):
+            cache.set(lock_key, "next-request", 60)
+
+        with mock.patch("cart.stores.hold_stock", side_effect=expire_and_retake):
+            response = self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 1})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(cache.get(lock_key), "next-request")
+        self.assertEqual(cart_store.get(owner).items, [])
+
+
+# ------------------------------
+# Guest carts
+# ------------------------------
+class GuestCartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_first_write_issues_token(self):
+        product = create_products(1)[0]
+        url = reverse("cart-list")
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["items"], [])
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 2})
+        self.assertEqual(response.status_code, 201)
+        token = response["X-Cart-Token"]
+
+        response = self.client.get(url, HTTP_X_CART_TOKEN=token)
+        self.assertEqual(response.data["totalQty"], 2)
+        self.assertNotIn("X-Cart-Token", response)
+        cart = Cart.objects.get()
+        self.assertIsNone(cart.user)
+
+    def test_forged_token_is_ignored(self):
+        product = create_products(1)[0]
+        self.client.post(reverse("cart-add"), {"product_id": product.id, "quantity": 1})
+        token = Cart.objects.get().token
+
+        response = self.client.get(reverse("cart-list"), HTTP_X_CART_TOKEN=f"{token}:forged")
+
+        self.assertEqual(response.data["items"], [])
+
+    def test_login_merges_guest_cart_clamped_to_stock(self):
+        user = User.objects.create_user(email="guest@example.com", password="pass")
+        both, guest_only, sold_out = create_products(3, stock=3)
+        user_cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=user_cart, product=both, quantity=2)
+        guest_cart = Cart.objects.create(token="a" * 32)
+        CartItem.objects.bulk_create([
+            CartItem(cart=guest_cart, product=both, quantity=2),
+            CartItem(cart=guest_cart, product=guest_only, quantity=1),
+            CartItem(cart=guest_cart, product=sold_out, quantity=1),
+        ])
+        Product.objects.filter(pk=sold_out.pk).update(stock=0)
+
+        response = self.client.post(
+            reverse("login"),
+            {"email": user.email, "password": "pass", "cart_token": sign_guest_token(guest_cart.token)},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart=user_cart).values_list("product_id", "quantity")),
+            {both.id: 3, guest_only.id: 1},
+        )
+        self.assertFalse(Cart.objects.filter(pk=guest_cart.pk).exists())
+
+    def test_prune_deletes_only_stale_guest_carts(self):
+        user = User.objects.create_user(email="keep@example.com", password="pass")
+        product = create_products(1)[0]
+        stale = Cart.objects.create(token="s" * 32)
+        CartItem.objects.create(cart=stale, product=product)
+        fresh = Cart.objects.create(token="f" * 32)
+        owned = Cart.objects.create(user=user)
+        long_ago = timezone.now() - timedelta(days=60)
+        Cart.objects.filter(pk__in=[stale.pk, owned.pk]).update(updated_at=long_ago)
+
+        call_command("prune_guest_carts", stdout=StringIO())
+
+        self.assertEqual(set(Cart.objects.values_list("pk", flat=True)), {fresh.pk, owned.pk})
+        self.assertFalse(CartItem.objects.exists())
+
+
+# ------------------------------
+# Stock holds
+# ------------------------------
+class StockReservationTests(CartTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = APIClient()
+        self.other.force_authenticate(User.objects.create_user(email="rival@example.com", password="pass"))
+        self.product = create_products(1, stock=2)[0]
+
+    def add(self, client, quantity):
+        return client.post(reverse("cart-add"), {"product_id": self.product.id, "quantity": quantity})
+
+    def reserved(self):
+        self.product.refresh_from_db()
+        return self.product.reserved_stock
+
+    def test_holds_take_stock_from_other_carts(self):
+        self.assertEqual(self.add(self.client, 2).status_code, 201)
+        self.assertEqual(self.reserved(), 2)
+
+        response = self.add(self.other, 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Only 0 available", response.data["message"])
+
+        item = CartItem.objects.get(cart=self.cart)
+        self.client.patch(reverse("cart-update-item", args=[item.id]), {"quantity": 1})
+        self.assertEqual(self.reserved(), 1)
+        self.assertEqual(self.add(self.other, 1).status_code, 201)
+        self.assertEqual(self.reserved(), 2)
+
+        self.client.delete(reverse("cart-remove-item", args=[item.id]))
+        self.assertEqual(self.reserved(), 1)
+        self.assertFalse(StockReservation.objects.filter(owner_key=f"user:{self.user.id}").exists())
+
+    def test_expired_holds_are_released(self):
+        self.add(self.client, 2)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        call_command("release_stock_holds", stdout=StringIO())
+
+        self.assertEqual(self.reserved(), 0)
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(self.add(self.other, 2).status_code, 201)
+
+    def test_checkout_converts_hold_into_sale(self):
+        self.add(self.client, 2)
+
+        response = self.other.post(
+            reverse("create-order"), {"items": [{"product_id": self.product.id, "quantity": 1}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            reverse("create-order"), {"items": [{"product_id": self.product.id, "quantity": 2}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (0, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_checkout_of_fewer_units_releases_the_rest(self):
+        self.add(self.client, 2)
+
+        response = self.client.post(
+            reverse("create-order"), {"items": [{"product_id": self.product.id, "quantity": 1}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (1, 0))
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(self.add(self.other, 1).status_code, 201)
+
+    def test_checkout_cannot_take_stock_held_by_others(self):
+        self.add(self.other, 1)
+        owner_key = CartOwner.for_user(self.user).key
+
+        # The rival's hold landed after the buyer's stock check
+        self.assertEqual(consume_holds(owner_key, {}, {self.product.id: 2}), [self.product.id])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (2, 1))
+
+        self.assertEqual(consume_holds(owner_key, {}, {self.product.id: 1}), [])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved_stock), (1, 1))
+
+    def test_catalog_publishes_available_stock(self):
+        self.add(self.client, 1)
+
+        detail = APIClient().get(reverse("product-detail", args=[self.product.slug]))
+        self.assertEqual(detail.data["stock"], 1)
+        staff = APIClient()
+        staff.force_authenticate(User.objects.create_user(email="staff@example.com", password="pass", is_staff=True))
+        feed = staff.get(reverse("product-export"))
+        self.assertEqual(json.loads(b"".join(feed.streaming_content))["stock"], 1)
@@ -1,42 +1,99 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
-from django.db import transaction
-from django.db.models import F, Sum
+from rest_framework.permissions import AllowAny
+from django.http import Http404
 
-from .models import Cart, CartItem
-from gadjet_shop.models import Product
+from gadjet_shop.conditional import not_modified_response, set_validators
 from .serializers import (
     CartSerializer,
     AddUpdateCartItemSerializer,
+    CartBatchSerializer,
     UpdateCartItemQuantitySerializer
 )
+from .services.batch import CartBatchError
+from .services.reservations import available_to, held_quantities
+from .guest import GUEST_TOKEN_HEADER, new_guest_token, read_guest_token, sign_guest_token
+from .owners import CartOwner
+from .stores import cart_store
 
 
 class CartViewSet(viewsets.ViewSet):
     """
     Production-ready Cart API matching frontend cart.
     Endpoints:
-    - GET    /cart/                 -> get current user's cart
+    - GET    /cart/                 -> get current user's (or guest's) cart
     - POST   /cart/add/             -> add item to cart
     - PATCH  /cart/update/<pk>/     -> update quantity
     - DELETE /cart/remove/<pk>/     -> remove item
+    - POST   /cart/batch/           -> apply add/set/remove operations at once
     - GET    /cart/validate/        -> validate cart stock before payment
+
+    Storage goes through cart_store (settings.CART_STORE). Anonymous
+    clients get a guest cart: the first write returns a signed token in the
+    X-Cart-Token header, which they send back on later requests and to
+    /api/auth/login/ to merge the cart into their account.
     """
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
+    issued_token = None
 
-    def get_cart(self, user):
-        """Helper: Get or create a cart for a user."""
-        cart, _ = Cart.objects.get_or_create(user=user)
-        return cart
+    def get_owner(self, request, create=False):
+        """
+        The request's cart owner: the user, or the guest token it sent.
+        Without a token, `create` issues one (returned in the response
+        header); otherwise there is no cart yet and None is returned.
+        """
+        if request.user.is_authenticated:
+            return CartOwner.for_user(request.user)
+        token = read_guest_token(request)
+        if token is None and create:
+            token = self.issued_token = new_guest_token()
+        return CartOwner(token=token) if token else None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.issued_token and response.status_code < 400:
+            response[GUEST_TOKEN_HEADER] = sign_guest_token(self.issued_token)
+        return response
+
+    def cart_response(self, request, cart, status_code):
+        """
+        Serialize the cart from one items query (products and hero images
+        joined in); totals are then summed in Python from the loaded items.
+        """
+        cart_store.items(cart)
+        serializer = CartSerializer(cart, context={'request': request})
+        return Response(serializer.data, status=status_code)
+
+    def error_response(self, exc, **extra):
+        return Response(
+            {
+                "status": "error",
+                "message": str(exc),
+                **extra,
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
     # GET /cart/
     def list(self, request):
-        cart = self.get_cart(request.user)
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        owner = self.get_owner(request)
+        if owner is None:
+            # Guest without a cart yet; nothing to store
+            return Response(
+                {"id": None, "items": [], "totalQty": 0, "totalPrice": "0.00"},
+                status=status.HTTP_200_OK
+            )
+
+        cart = cart_store.get(owner)
+        etag, last_modified = cart_store.validators(cart)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = self.cart_response(request, cart, status.HTTP_200_OK)
+        set_validators(response, etag, last_modified)
+        return response
 
     # POST /cart/add/
     @action(detail=False, methods=['post'])
@@ -44,86 +101,66 @@ class CartViewSet(viewsets.ViewSet):
         serializer = AddUpdateCartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        product_id = serializer.validated_data['product_id']
-        quantity_to_add = serializer.validated_data['quantity']
-
-        product = get_object_or_404(Product, id=product_id)
-        cart = self.get_cart(request.user)
-
-        with transaction.atomic():
-            # Lock the CartItem row if exists
-            item, created = CartItem.objects.select_for_update().get_or_create(
-                cart=cart,
-                product=product,
-                defaults={'quantity': 0}
-            )
-
-            # Check combined quantity
-            new_quantity = item.quantity + quantity_to_add
-            if new_quantity > product.stock:
-                available = max(product.stock - item.quantity, 0)
-                return Response(
-                    {
-                        "status": "error",
-                        "message": f"Cannot add {quantity_to_add} items. Only {available} left in stock."
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            item.quantity = new_quantity
-            item.save()
-            item.refresh_from_db()  # refresh F() values
+        try:
+            cart = cart_store.apply(self.get_owner(request, create=True), [{
+                "op": "add",
+                "product_id": serializer.validated_data['product_id'],
+                "quantity": serializer.validated_data['quantity'],
+            }])
+        except CartBatchError as exc:
+            return self.error_response(exc)
 
         # Return updated cart
-        cart_serializer = CartSerializer(cart, context={'request': request})
-        return Response(cart_serializer.data, status=status.HTTP_201_CREATED)
+        return self.cart_response(request, cart, status.HTTP_201_CREATED)
 
     # PATCH /cart/update/<pk>/
     @action(detail=True, methods=['patch'], url_path='update')
     def update_item(self, request, pk=None):
         serializer = UpdateCartItemQuantitySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        new_quantity = serializer.validated_data['quantity']
-
-        with transaction.atomic():
-            item = get_object_or_404(
-                CartItem.objects.select_for_update(),
-                id=pk,
-                cart__user=request.user
-            )
 
-            if new_quantity > item.product.stock:
-                return Response(
-                    {
-                        "status": "error",
-                        "message": f"Cannot set quantity to {new_quantity}. Only {item.product.stock} available."
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        owner = self.get_owner(request)
+        if owner is None:
+            raise Http404("No CartItem matches the given query.")
 
-            item.quantity = new_quantity
-            item.save()
+        try:
+            cart = cart_store.update_line(
+                owner, pk, {"op": "set", "quantity": serializer.validated_data['quantity']}
+            )
+        except CartBatchError as exc:
+            return self.error_response(exc)
 
         # Return updated cart
-        cart = self.get_cart(request.user)
-        cart_serializer = CartSerializer(cart, context={'request': request})
-        return Response(cart_serializer.data, status=status.HTTP_200_OK)
+        return self.cart_response(request, cart, status.HTTP_200_OK)
 
     # DELETE /cart/remove/<pk>/
     @action(detail=True, methods=['delete'], url_path='remove')
     def remove_item(self, request, pk=None):
-        with transaction.atomic():
-            item = get_object_or_404(
-                CartItem.objects.select_for_update(),
-                id=pk,
-                cart__user=request.user
-            )
-            item.delete()
+        owner = self.get_owner(request)
+        if owner is None:
+            raise Http404("No CartItem matches the given query.")
+
+        cart = cart_store.update_line(owner, pk, {"op": "remove"})
 
         # Return updated cart
-        cart = self.get_cart(request.user)
-        cart_serializer = CartSerializer(cart, context={'request': request})
-        return Response(cart_serializer.data, status=status.HTTP_200_OK)
+        return self.cart_response(request, cart, status.HTTP_200_OK)
+
+    # POST /cart/batch/
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Apply a list of add/set/remove operations in one transaction and
+        return the cart once; nothing is written if any line fails.
+        """
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            cart = cart_store.apply(self.get_owner(request, create=True), serializer.validated_data['operations'])
+        except CartBatchError as exc:
+            return self.error_response(exc, errors=exc.errors)
+
+        return self.cart_response(request, cart, status.HTTP_200_OK)
 
     # NEW: GET /cart/validate/
     @action(detail=False, methods=['get'])
@@ -132,17 +169,24 @@ class CartViewSet(viewsets.ViewSet):
         Validate the user's cart before payment.
         Returns out-of-stock items and whether the cart is valid.
         """
-        cart = self.get_cart(request.user)
-        cart_items = CartItem.objects.filter(cart=cart).select_related("product")
+        owner = self.get_owner(request)
+        items, held = [], {}
+        if owner is not None:
+            # The buyer is heading to payment: persist a write-behind cart now
+            cart_store.flush(owner)
+            items = cart_store.items(cart_store.get(owner))
+            held = held_quantities(owner.key, [item.product_id for item in items], lock=False)
 
         out_of_stock = []
-        for item in cart_items:
-            if item.quantity > item.product.stock:
+        for item in items:
+            # Stock held by other carts is not available; this cart's holds are
+            available = available_to(item.product, held.get(item.product_id, 0))
+            if item.quantity > available:
                 out_of_stock.append({
                     "product_id": item.product.id,
                     "product_name": item.product.name,
                     "requested_quantity": item.quantity,
-                    "available_stock": item.product.stock,
+                    "available_stock": available,
                 })
 
         if out_of_stock:
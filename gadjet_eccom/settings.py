@@ -3,6 +3,7 @@ from datetime import timedelta
 import os
 from dotenv import load_dotenv
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # --------------------------------------------------
 # BASE DIR & ENV
@@ -168,6 +169,52 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# --------------------------------------------------
+# CACHING
+# --------------------------------------------------
+# Use a shared backend (e.g. Redis or database cache) when running more than
+# one worker, so catalog invalidation reaches every process.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds catalog responses/facets stay cached (entries also expire on any catalog change)
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", "300"))
+
+# Cart storage: "cart.stores.DatabaseCartStore" reads and writes Cart rows
+# directly; "cart.stores.CacheCartStore" keeps active carts in CART_CACHE and
+# persists them via `manage.py flush_carts` (and at validate/checkout). The
+# cache store needs a shared cache that does not evict (e.g. Redis).
+CART_STORE = os.getenv("CART_STORE", "cart.stores.DatabaseCartStore")
+CART_CACHE = os.getenv("CART_CACHE", "default")
+CART_CACHE_TIMEOUT = int(os.getenv("CART_CACHE_TIMEOUT", str(30 * 24 * 3600)))
+
+# Minutes adding to the cart holds stock for (Product.reserved_stock); holds
+# are refreshed on every cart write and `manage.py release_stock_holds`
+# returns expired ones to sale
+CART_HOLD_MINUTES = int(os.getenv("CART_HOLD_MINUTES", "15"))
+
+# Days an untouched guest cart is kept before `manage.py prune_guest_carts` deletes it
+GUEST_CART_RETENTION_DAYS = int(os.getenv("GUEST_CART_RETENTION_DAYS", "14"))
+
+# Product page link used in the partner feeds ({slug} is filled in)
+PRODUCT_FEED_LINK = os.getenv("PRODUCT_FEED_LINK", f"{FRONTEND_URL}/products/{{slug}}")
+
+# Sales rankings: ?ordering=bestselling counts units over the last N days,
+# ?ordering=trending halves a day's weight every TRENDING_HALF_LIFE_DAYS
+BESTSELLER_WINDOW_DAYS = int(os.getenv("BESTSELLER_WINDOW_DAYS", "7"))
+TRENDING_HALF_LIFE_DAYS = float(os.getenv("TRENDING_HALF_LIFE_DAYS", "3"))
+
+# Co-purchase matrix kept between incremental `build_copurchases` runs
+# (rebuilt from all orders when missing)
+COPURCHASE_STATE_PATH = os.getenv("COPURCHASE_STATE_PATH", str(BASE_DIR / "var" / "copurchase.npz"))
+
+# Days deleted-product tombstones are kept; older ?updated_since= values need a full resync
+PRODUCT_TOMBSTONE_RETENTION_DAYS = int(os.getenv("PRODUCT_TOMBSTONE_RETENTION_DAYS", "30"))
+
 # --------------------------------------------------
 # PAYSTACK
 # --------------------------------------------------
@@ -183,6 +230,9 @@ CORS_ALLOWED_ORIGINS = os.getenv(
     "http://localhost:3000,http://127.0.0.1:3000,https://fullstack-eccomm.vercel.app"
 ).split(",")
 CORS_ALLOW_CREDENTIALS = True
+# Guest carts travel in X-Cart-Token (see cart.guest)
+CORS_ALLOW_HEADERS = (*default_headers, "x-cart-token")
+CORS_EXPOSE_HEADERS = ["X-Cart-Token"]
 
 CSRF_TRUSTED_ORIGINS = [
     "https://fullstack-eccomm.vercel.app",
@@ -239,6 +289,25 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
+# Backend for product/review images (see gadjet_shop.storage); set to
+# "django.core.files.storage.FileSystemStorage" to keep uploads local
+IMAGE_STORAGE = os.getenv("IMAGE_STORAGE", "cloudinary_storage.storage.MediaCloudinaryStorage")
+
+# Admin image uploads are staged here until `manage.py process_image_uploads`
+# moves them to IMAGE_STORAGE (must be on the same disk as the worker)
+IMAGE_STAGING_ROOT = os.getenv("IMAGE_STAGING_ROOT", str(MEDIA_ROOT / "staging"))
+
+# Failed uploads are retried after IMAGE_UPLOAD_RETRY_DELAY seconds times the
+# attempt number, and marked failed after IMAGE_UPLOAD_MAX_ATTEMPTS (requeue
+# them with `process_image_uploads --retry-failed`). A claimed upload whose
+# worker died is picked up again after IMAGE_UPLOAD_LEASE seconds
+IMAGE_UPLOAD_MAX_ATTEMPTS = int(os.getenv("IMAGE_UPLOAD_MAX_ATTEMPTS", "5"))
+IMAGE_UPLOAD_RETRY_DELAY = int(os.getenv("IMAGE_UPLOAD_RETRY_DELAY", "60"))
+IMAGE_UPLOAD_LEASE = int(os.getenv("IMAGE_UPLOAD_LEASE", "600"))
+
+# Processes used to render responsive image variants (0 = render inline)
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
 print("Cloud name:", os.getenv("CLOUDINARY_CLOUD_NAME"))
 print("API key:", os.getenv("CLOUDINARY_API_KEY"))
 
@@ -1,3 +1,4 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
 import json
@@ -5,14 +6,31 @@ import json
 from .models import Product, ProductImage, Review, ReviewImage, Category
 from orders.models import Order, OrderItem
 from payments.models import Payment  # <-- add Payment model
+from .services.reviews import approve_reviews
+from .services.uploads import stage_upload
 
 # -----------------------------
 # Inline for Product Images
+# (uploads are staged locally and published by `manage.py process_image_uploads`)
 # -----------------------------
+class ProductImageInlineForm(forms.ModelForm):
+    class Meta:
+        model = ProductImage
+        fields = ('image', 'is_hero', 'order')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # `image` is blank while an upload is pending, so require it here instead
+        if not cleaned_data.get('image') and not self.instance.staged_image:
+            self.add_error('image', "Upload an image.")
+        return cleaned_data
+
+
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
+    form = ProductImageInlineForm
     extra = 1
-    readonly_fields = ()
+    readonly_fields = ('status',)
 
 # -----------------------------
 # Inline for Review Images
@@ -48,6 +66,20 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
     inlines = [ProductImageInline, ReviewInline]
 
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not ProductImage:
+            return super().save_formset(request, form, formset, change)
+
+        instances = formset.save(commit=False)
+        for obj in formset.deleted_objects:
+            obj.delete()
+        for instance in instances:
+            # New file: write it to local staging instead of Cloudinary
+            if instance.image and not instance.image._committed:
+                stage_upload(instance)
+            instance.save()
+        formset.save_m2m()
+
 # -----------------------------
 # Category Admin
 # -----------------------------
@@ -72,7 +104,8 @@ class ReviewAdmin(admin.ModelAdmin):
     actions = ['approve_selected_reviews']
 
     def approve_selected_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        # Goes through approve_reviews so product rating stats stay in sync
+        updated = approve_reviews(queryset)
         self.message_user(request, f"{updated} review(s) approved successfully.")
 
     approve_selected_reviews.short_description = "Approve selected reviews"
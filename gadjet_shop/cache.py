@@ -0,0 +1,134 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+# ----------------------------------
+# Catalog generation counter
+# ----------------------------------
+def get_catalog_version():
+    """
+    Current catalog generation. Cached catalog data is keyed by it, so
+    bumping the counter invalidates everything at once without scanning keys.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old keys
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        return get_catalog_version()
+
+
+def catalog_cache_key(prefix, params, ignore=(), scope=""):
+    """
+    Cache key for catalog data derived from the current generation, an
+    optional scope (e.g. the URL) and the normalized query params (sorted,
+    empty values and `ignore` keys dropped).
+    """
+    normalized = sorted(
+        (key, value)
+        for key in params
+        if key not in ignore
+        for value in params.getlist(key)
+        if value != ""
+    )
+    raw = f"{scope}?{urlencode(normalized)}"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"catalog:{prefix}:{get_catalog_version()}:{digest}"
+
+
+def catalog_cache_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+# ----------------------------------
+# Response cache for public catalog views
+# ----------------------------------
+class CatalogResponseCacheMixin:
+    """
+    Caches successful anonymous GET responses under the catalog generation,
+    the absolute URL and the normalized query string.
+
+    Concurrent misses for the same key are single-flighted: the first request
+    takes a short lock and renders, the others poll for its result and render
+    themselves once the lock is released without one (the response was not
+    cacheable, e.g. a 404) or the lock holder does not finish in time.
+
+    ETag / Last-Modified headers are cached with the body, so conditional
+    requests that hit the cache are answered without touching the database.
+    """
+    cache_prefix = "response"
+    lock_timeout = 10
+    lock_poll_interval = 0.05
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        key = catalog_cache_key(
+            self.cache_prefix,
+            request.query_params,
+            scope=request.build_absolute_uri(request.path),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return self.cached_response(request, cached)
+
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, self.lock_timeout):
+            cached = self.wait_for_cached(key, lock_key)
+            if cached is not None:
+                return self.cached_response(request, cached)
+            return super().get(request, *args, **kwargs)
+
+        try:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                headers = {
+                    header: response[header]
+                    for header in ("ETag", "Last-Modified")
+                    if response.has_header(header)
+                }
+                cache.set(key, {"data": response.data, "headers": headers}, catalog_cache_timeout())
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    def cached_response(self, request, cached):
+        headers = cached["headers"]
+        if "ETag" in headers:
+            not_modified = get_conditional_response(
+                request,
+                etag=headers["ETag"],
+                last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+            )
+            if not_modified is not None:
+                return not_modified
+        return Response(cached["data"], status=status.HTTP_200_OK, headers=headers)
+
+    def wait_for_cached(self, key, lock_key):
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            found = cache.get_many([key, lock_key])
+            if key in found:
+                return found[key]
+            if lock_key not in found:
+                # The lock holder finished without caching a response
+                return None
+        return None
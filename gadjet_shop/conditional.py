@@ -0,0 +1,53 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+
+# ----------------------------------
+# Conditional GET (ETag / Last-Modified)
+# ----------------------------------
+def make_etag(*parts):
+    """Strong ETag from cheap version values (timestamps, counters, ids)."""
+    raw = ":".join(str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """A 304 response if the request's validators still match, else None."""
+    return get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+
+
+def set_validators(response, etag, last_modified=None):
+    if response.status_code == status.HTTP_200_OK:
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(_timestamp(last_modified))
+    return response
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since with 304 before any
+    serialization. Views implement get_validators() with a cheap query
+    returning (etag, last_modified), or None to skip conditional handling.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().get(request, *args, **kwargs), etag, last_modified)
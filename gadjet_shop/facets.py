@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.db.models import Count, Q
+
+# Upper bounds of the price facet buckets (NGN); the last bucket is open-ended
+PRICE_BUCKET_BOUNDS = [
+    Decimal("50000"),
+    Decimal("100000"),
+    Decimal("250000"),
+    Decimal("500000"),
+    Decimal("1000000"),
+]
+
+
+def price_buckets():
+    """[(min, max), ...] with None for open ends."""
+    lower = [None] + PRICE_BUCKET_BOUNDS
+    upper = PRICE_BUCKET_BOUNDS + [None]
+    return list(zip(lower, upper))
+
+
+def compute_product_facets(queryset):
+    """
+    Category, brand and price-bucket counts for an already filtered product
+    queryset, in three grouped aggregate queries.
+    """
+    # Distinct counts keep facets right if a filter ever joins a to-many relation
+    queryset = queryset.order_by()
+
+    categories = (
+        queryset
+        .values("category__id", "category__name", "category__slug")
+        .annotate(count=Count("id", distinct=True))
+        .order_by("-count", "category__name")
+    )
+    brands = (
+        queryset
+        .values("brand")
+        .annotate(count=Count("id", distinct=True))
+        .order_by("-count", "brand")
+    )
+
+    buckets = price_buckets()
+    bucket_counts = {"total": Count("id", distinct=True)}
+    for index, (low, high) in enumerate(buckets):
+        condition = Q()
+        if low is not None:
+            condition &= Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        bucket_counts[f"bucket_{index}"] = Count("id", filter=condition, distinct=True)
+    totals = queryset.aggregate(**bucket_counts)
+
+    return {
+        "total": totals["total"],
+        "categories": [
+            {
+                "id": row["category__id"],
+                "name": row["category__name"],
+                "slug": row["category__slug"],
+                "count": row["count"],
+            }
+            for row in categories
+        ],
+        "brands": [{"name": row["brand"], "count": row["count"]} for row in brands],
+        "price_ranges": [
+            {
+                "min": str(low) if low is not None else None,
+                "max": str(high) if high is not None else None,
+                "count": totals[f"bucket_{index}"],
+            }
+            for index, (low, high) in enumerate(buckets)
+        ],
+    }
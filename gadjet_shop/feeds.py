@@ -0,0 +1,121 @@
+import csv
+import json
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import Product, ProductImage
+
+CURRENCY = "NGN"
+
+# feed name -> (content type, file extension)
+FEED_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "merchant": ("application/xml", "xml"),
+}
+
+CSV_COLUMNS = [
+    "id", "slug", "name", "brand", "category", "price", "currency", "stock",
+    "rating", "review_count", "link", "image", "additional_images", "description",
+]
+
+
+def feed_products(chunk_size=1000):
+    """
+    Every product with its category and published images, read `chunk_size`
+    rows at a time (one product query plus one image query per chunk), so
+    memory stays flat for any catalog size.
+    """
+    return (
+        Product.objects
+        .select_related("category")
+        .prefetch_related(Prefetch("images", queryset=ProductImage.objects.filter(status="ready")))
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def product_record(product, absolute_url):
+    """Flat dict for one product; `absolute_url` turns storage URLs into absolute ones."""
+    images = [absolute_url(image.image.url) for image in product.images.all()]
+    return {
+        "id": product.id,
+        "slug": product.slug,
+        "name": product.name,
+        "brand": product.brand,
+        "category": product.category.name,
+        "price": str(product.price),
+        "currency": CURRENCY,
+        # Units not held by carts
+        "stock": product.available_stock,
+        "rating": product.rating,
+        "review_count": product.review_count,
+        "link": settings.PRODUCT_FEED_LINK.format(slug=product.slug),
+        "image": images[0] if images else None,
+        "additional_images": images[1:],
+        "description": product.description,
+    }
+
+
+class _Echo:
+    """csv.writer target that hands each formatted row back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def render_ndjson(records):
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+
+def render_csv(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for record in records:
+        record = {**record, "additional_images": "|".join(record["additional_images"])}
+        yield writer.writerow([record[column] for column in CSV_COLUMNS])
+
+
+def render_merchant(records):
+    """Google Merchant Center RSS 2.0 feed."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+        "<title>Gadjet catalog</title>\n"
+        f"<link>{escape(settings.FRONTEND_URL)}</link>\n"
+        "<description>Product feed</description>\n"
+    )
+    for record in records:
+        fields = [
+            ("g:id", record["id"]),
+            ("g:title", record["name"]),
+            ("g:description", record["description"]),
+            ("g:link", record["link"]),
+            ("g:image_link", record["image"]),
+            *[("g:additional_image_link", url) for url in record["additional_images"][:10]],
+            ("g:availability", "in_stock" if record["stock"] > 0 else "out_of_stock"),
+            ("g:price", f"{record['price']} {record['currency']}"),
+            ("g:brand", record["brand"]),
+            ("g:product_type", record["category"]),
+            ("g:condition", "new"),
+        ]
+        yield "<item>" + "".join(
+            f"<{tag}>{escape(str(value))}</{tag}>" for tag, value in fields if value is not None
+        ) + "</item>\n"
+    yield "</channel>\n</rss>\n"
+
+
+RENDERERS = {
+    "ndjson": render_ndjson,
+    "csv": render_csv,
+    "merchant": render_merchant,
+}
+
+
+def stream_feed(feed, absolute_url, chunk_size=1000):
+    """Generator of text chunks for the whole catalog in the given feed format."""
+    records = (product_record(product, absolute_url) for product in feed_products(chunk_size))
+    return RENDERERS[feed](records)
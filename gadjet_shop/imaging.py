@@ -0,0 +1,47 @@
+"""
+Pillow rendering for responsive image variants.
+
+Kept free of Django imports so it can run in worker processes started with
+the "spawn" method (see gadjet_shop.services.variants).
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Variant label -> max width in pixels (never upscaled)
+VARIANT_WIDTHS = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1200,
+}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def render_variant(data: bytes, width: int) -> dict:
+    """
+    Resize the original image bytes to `width` (keeping aspect ratio) and
+    encode it as WebP and JPEG. Returns dimensions and encoded bytes.
+    """
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        webp = BytesIO()
+        image.convert("RGBA" if has_alpha else "RGB").save(webp, "WEBP", quality=WEBP_QUALITY)
+
+        jpeg = BytesIO()
+        image.convert("RGB").save(
+            jpeg, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+        )
+
+        return {
+            "width": image.width,
+            "height": image.height,
+            "webp": webp.getvalue(),
+            "jpeg": jpeg.getvalue(),
+        }
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from gadjet_shop.models import Product
+
+# The icontains filters exposed by ProductListAPIView (plus name)
+FILTERS = [
+    ("brand__icontains", "brand"),
+    ("category__name__icontains", "category name"),
+    ("name__icontains", "name"),
+]
+
+TRIGRAM_INDEXES = ["product_brand_trgm_idx", "product_name_trgm_idx", "category_name_trgm_idx"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN ANALYZE for the catalog icontains filters without (before) "
+        "and with (after) the trigram indexes. PostgreSQL only; seed data first "
+        "with `manage.py seed_catalog`. The 'before' plans drop the indexes inside "
+        "a transaction that is rolled back, which locks the tables meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--term", default="sonic")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Trigram indexes only exist on PostgreSQL.")
+
+        term = options["term"]
+        querysets = [
+            (label, Product.objects.filter(**{lookup: term}).order_by("price")[:10])
+            for lookup, label in FILTERS
+        ]
+        self.stdout.write(f"Catalog size: {Product.objects.count()} product(s)\n")
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in TRIGRAM_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            for label, queryset in querysets:
+                self.report(f"{label} icontains '{term}' -- before", queryset)
+            transaction.set_rollback(True)
+
+        for label, queryset in querysets:
+            self.report(f"{label} icontains '{term}' -- after", queryset)
+
+    def report(self, title, queryset):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(queryset.explain(analyze=True))
+        self.stdout.write("")
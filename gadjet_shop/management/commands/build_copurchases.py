@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gadjet_shop.services.copurchase import build_copurchases
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the 'frequently bought together' table from orders placed since the last run "
+        "(sparse order x product matrix, kept at COPURCHASE_STATE_PATH). Use --full to rebuild "
+        "from all orders, e.g. after changing --top-k or to drop cancelled orders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=10)
+        parser.add_argument("--full", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=5_000, help="Orders per matrix update")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        orders, products = build_copurchases(
+            k=options["top_k"],
+            full=options["full"],
+            batch_size=options["batch_size"],
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Folded in {orders} order(s), rewrote related products for {products} product(s) in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from gadjet_shop.models import Product
+from gadjet_shop.services.purchases import purchased_products, reviewed_products
+from payments.models import Payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Print EXPLAIN for every query the hot endpoints run, captured from real "
+        "requests. Seed data first with `manage.py seed_catalog --orders 50000 "
+        "--reviews 100000` so the planner sees realistic row counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (PostgreSQL only)")
+
+    def handle(self, *args, **options):
+        if options["analyze"] and connection.vendor != "postgresql":
+            raise CommandError("--analyze is only supported on PostgreSQL.")
+        self.analyze = options["analyze"]
+
+        product = Product.objects.select_related("category").order_by("-review_count").first()
+        buyer = (
+            get_user_model().objects
+            .annotate(order_total=Count("orders"))
+            .order_by("-order_total")
+            .first()
+        )
+        if product is None or buyer is None:
+            raise CommandError("No data to explain; run `manage.py seed_catalog` first.")
+
+        # Authenticated requests bypass the anonymous response cache
+        client = APIClient()
+        client.force_authenticate(buyer)
+        list_url = reverse("product-list")
+        endpoints = [
+            ("products by category, by price", list_url, {"category__name": product.category.name, "ordering": "price"}),
+            ("products by brand, by price", list_url, {"brand": product.brand, "ordering": "price"}),
+            ("product detail", reverse("product-detail", args=[product.slug]), {}),
+            ("product reviews", reverse("review-list", args=[product.id]), {}),
+            ("my orders", reverse("user-orders"), {}),
+        ]
+
+        self.stdout.write(f"Catalog size: {Product.objects.count()} product(s)\n")
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for title, url, params in endpoints:
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, params)
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{title}: GET {url} -> {response.status_code}"))
+                for query in queries.captured_queries:
+                    if query["sql"].lstrip().upper().startswith("SELECT"):
+                        self.report_sql(query["sql"])
+
+        # Hot queries that are not behind a GET endpoint
+        querysets = [
+            # Review eligibility cache misses (gadjet_shop.services.purchases)
+            ("review eligibility: purchased products", purchased_products(buyer.id)),
+            ("review eligibility: reviewed products", reviewed_products(buyer.id)),
+            ("initialized payments by age", Payment.objects.filter(status="initialized").order_by("created_at")[:100]),
+        ]
+        for title, queryset in querysets:
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain(analyze=True) if self.analyze else queryset.explain())
+            self.stdout.write("")
+
+    def report_sql(self, sql):
+        prefix = connection.ops.explain_query_prefix(**({"analyze": True} if self.analyze else {}))
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}")
+            rows = cursor.fetchall()
+        self.stdout.write(sql)
+        self.stdout.write("\n".join(" ".join(str(column) for column in row) for row in rows))
+        self.stdout.write("")
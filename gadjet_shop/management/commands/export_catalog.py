@@ -0,0 +1,36 @@
+from urllib.parse import urljoin
+
+from django.core.management.base import BaseCommand
+
+from gadjet_shop.feeds import FEED_FORMATS, stream_feed
+
+
+class Command(BaseCommand):
+    help = "Stream the whole catalog as NDJSON, CSV or Google Merchant XML to a file or stdout"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--feed", choices=list(FEED_FORMATS), default="ndjson")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--base-url",
+            default="",
+            help="Prefix for relative image URLs (e.g. https://api.example.com)",
+        )
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"]
+        chunks = stream_feed(
+            options["feed"],
+            lambda url: urljoin(base_url, url),
+            options["chunk_size"],
+        )
+
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+            fh.writelines(chunks)
+        self.stdout.write(self.style.SUCCESS(f"Catalog written to {options['output']}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from gadjet_shop.models import ProductImage, ReviewImage
+from gadjet_shop.services.variants import generate_variants
+
+
+class Command(BaseCommand):
+    help = "Render responsive variants for product/review images that have none yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        for model in (ProductImage, ReviewImage):
+            last_id = 0
+            done = 0
+            while True:
+                batch = list(
+                    model.objects.filter(id__gt=last_id, variants={})
+                    .order_by("id")[:batch_size]
+                )
+                if not batch:
+                    break
+                done += len(generate_variants(batch))
+                last_id = batch[-1].id
+                self.stdout.write(f"{model.__name__}: {done} image(s) processed...")
+
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: variants generated for {done} image(s)"))
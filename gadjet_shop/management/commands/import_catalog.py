@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gadjet_shop.cache import bump_catalog_version
+from gadjet_shop.services.catalog_import import import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products from a CSV or JSONL file (use - for stdin) and upsert them by slug. "
+        "Columns: name, slug (optional; derived from the name, or name and brand when another "
+        "brand's product has it), description, brand, category, price, stock. "
+        "Unknown categories are created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1_000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"]
+        if fmt is None:
+            if path.endswith(".csv"):
+                fmt = "csv"
+            elif path.endswith((".jsonl", ".ndjson")):
+                fmt = "jsonl"
+            else:
+                raise CommandError("Cannot tell the format from the file name; pass --format.")
+        if path != "-" and not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        started = batch_started = time.monotonic()
+        total_rows = total_upserted = total_errors = 0
+        try:
+            batches = import_products(read_rows(stream, fmt), options["batch_size"])
+            for number, (rows, upserted, errors) in enumerate(batches, start=1):
+                now = time.monotonic()
+                elapsed, batch_started = now - batch_started, now
+                total_rows += rows
+                total_upserted += upserted
+                total_errors += len(errors)
+                for line, message in errors:
+                    self.stderr.write(f"Row {line}: {message}")
+                self.stdout.write(
+                    f"Batch {number}: {upserted}/{rows} row(s) in {elapsed:.2f}s "
+                    f"({rows / max(elapsed, 1e-6):.0f} rows/s)"
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            # bulk_create skips the signals that normally invalidate the cache
+            if total_upserted:
+                bump_catalog_version()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {total_upserted} of {total_rows} row(s) in {elapsed:.1f}s "
+            f"({total_rows / max(elapsed, 1e-6):.0f} rows/s), {total_errors} skipped"
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gadjet_shop.services.uploads import publish_pending_uploads, retry_failed_uploads
+from gadjet_shop.services.variants import render_pending_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Background worker: push staged admin image uploads to image storage and "
+        "render variants for other new product/review images"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--workers", type=int, default=4, help="Parallel uploads")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Idle poll interval (seconds)")
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="Requeue uploads that ran out of attempts first"
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            self.stdout.write(f"Requeued {retry_failed_uploads()} failed upload(s)")
+
+        while True:
+            published, failed = publish_pending_uploads(options["batch_size"], options["workers"])
+            if published or failed:
+                self.stdout.write(f"Published {published} image(s), {failed} failed")
+                continue
+            rendered = render_pending_variants(options["batch_size"])
+            if rendered:
+                self.stdout.write(f"Rendered variants for {rendered} image(s)")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS("Image upload queue drained"))
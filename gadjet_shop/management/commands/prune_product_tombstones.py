@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gadjet_shop.models import ProductTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete product tombstones older than PRODUCT_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.PRODUCT_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = ProductTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstone(s)"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from gadjet_shop.models import Product
+from gadjet_shop.services.reviews import recompute_review_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute product review counts, averages and star histograms from approved reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                Product.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += recompute_review_stats(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"Recomputed {total} product(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Review stats recomputed for {total} product(s)"))
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gadjet_shop.models import ProductDailySales
+from gadjet_shop.services.sales import refresh_sales_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute bestseller units and time-decayed trending scores from the daily sales "
+        "rollup. Schedule at least daily; optionally drop old rollup rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--prune-days",
+            type=int,
+            help="Also delete daily sales rows older than this many days",
+        )
+
+    def handle(self, *args, **options):
+        ranked = refresh_sales_rankings(options["batch_size"])
+        self.stdout.write(f"Ranked {ranked} product(s)")
+
+        if options["prune_days"]:
+            cutoff = timezone.localdate() - timedelta(days=options["prune_days"])
+            deleted, _ = ProductDailySales.objects.filter(day__lt=cutoff).delete()
+            self.stdout.write(f"Pruned {deleted} daily sales row(s)")
+
+        self.stdout.write(self.style.SUCCESS("Sales rankings refreshed"))
@@ -0,0 +1,158 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from gadjet_shop.models import Category, Product, Review
+from gadjet_shop.services.reviews import recompute_review_stats
+from orders.models import Order, OrderItem
+from payments.models import Payment
+
+WORDS = [
+    "ultra", "pro", "max", "mini", "air", "nova", "edge", "prime", "lite", "plus",
+    "sonic", "pixel", "volt", "aero", "flux", "zen", "core", "arc", "nex", "orbit",
+]
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic catalog for benchmarks (bulk inserts, no signals)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--categories", type=int, default=50)
+        parser.add_argument("--brands", type=int, default=500)
+        parser.add_argument("--users", type=int, default=1_000, help="Buyers/reviewers (only with --orders/--reviews)")
+        parser.add_argument("--orders", type=int, default=0, help="Orders, each with 1-3 items and a payment")
+        parser.add_argument("--reviews", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+
+        categories = [
+            Category.objects.get_or_create(
+                slug=f"bench-category-{i}",
+                defaults={"name": f"Bench {rng.choice(WORDS).title()} Category {i}"},
+            )[0]
+            for i in range(options["categories"])
+        ]
+        brands = [
+            f"{rng.choice(WORDS).title()}{rng.choice(WORDS)}{i}"
+            for i in range(options["brands"])
+        ]
+
+        start_id = (Product.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+        started = time.monotonic()
+        batch = []
+        for i in range(start_id, start_id + options["products"]):
+            brand = rng.choice(brands)
+            name = f"{brand} {rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}"
+            batch.append(Product(
+                name=name,
+                slug=f"bench-product-{i}",
+                brand=brand,
+                description=" ".join(rng.choices(WORDS, k=20)),
+                category=rng.choice(categories),
+                price=rng.randint(1_000, 2_000_000) / 100,
+                stock=rng.randint(0, 500),
+            ))
+            if len(batch) >= batch_size:
+                Product.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['products']} product(s) in {elapsed:.1f}s"
+        ))
+
+        if options["orders"] or options["reviews"]:
+            products = list(Product.objects.values_list("id", "price"))
+            users = self.seed_users(options["users"], batch_size)
+            self.seed_orders(rng, options["orders"], users, products, batch_size)
+            self.seed_reviews(rng, options["reviews"], users, products, batch_size)
+
+    def seed_users(self, count, batch_size):
+        User = get_user_model()
+        User.objects.bulk_create(
+            [User(email=f"bench-user-{i}@example.com", password="!") for i in range(count)],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(email__startswith="bench-user-").values_list("id", flat=True))
+
+    def seed_orders(self, rng, count, users, products, batch_size):
+        started = time.monotonic()
+        statuses = [value for value, _ in Order.STATUS_CHOICES]
+        payment_statuses = [value for value, _ in Payment.STATUS_CHOICES]
+
+        for offset in range(0, count, batch_size):
+            lines = []
+            orders = []
+            for _ in range(min(batch_size, count - offset)):
+                items = [(rng.choice(products), rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+                lines.append(items)
+                orders.append(Order(
+                    user_id=rng.choice(users),
+                    status=rng.choice(statuses),
+                    total_price=sum(price * quantity for (_, price), quantity in items),
+                ))
+            Order.objects.bulk_create(orders)
+
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+                for order, items in zip(orders, lines)
+                for (product_id, price), quantity in items
+            ])
+            Payment.objects.bulk_create([
+                Payment(
+                    user_id=order.user_id,
+                    order=order,
+                    reference=f"bench-{order.id}",
+                    amount=order.total_price,
+                    status=rng.choice(payment_statuses),
+                )
+                for order in orders
+            ])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Seeded {count} order(s) in {elapsed:.1f}s"))
+
+    def seed_reviews(self, rng, count, users, products, batch_size):
+        started = time.monotonic()
+        taken = set(Review.objects.values_list("product_id", "user_id"))
+        product_ids = [product_id for product_id, _ in products]
+        pairs = set()
+        # Reviews are unique per (product, user); give up on the remainder
+        # if the catalog is too small to fit them
+        for _ in range(count * 2):
+            if len(pairs) >= count:
+                break
+            pair = (rng.choice(product_ids), rng.choice(users))
+            if pair not in taken:
+                pairs.add(pair)
+
+        Review.objects.bulk_create(
+            [
+                Review(
+                    product_id=product_id,
+                    user_id=user_id,
+                    rating=rng.randint(1, 5),
+                    comment=" ".join(rng.choices(WORDS, k=12)),
+                    is_approved=rng.random() < 0.8,
+                )
+                for product_id, user_id in pairs
+            ],
+            batch_size=batch_size,
+        )
+
+        reviewed = sorted({product_id for product_id, _ in pairs})
+        for offset in range(0, len(reviewed), batch_size):
+            recompute_review_stats(reviewed[offset:offset + batch_size])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Seeded {len(pairs)} review(s) in {elapsed:.1f}s"))
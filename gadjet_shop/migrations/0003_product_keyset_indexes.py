@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:40
+
+import cloudinary_storage.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0002_alter_review_unique_together'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(storage=cloudinary_storage.storage.MediaCloudinaryStorage(), upload_to='products/'),
+        ),
+        migrations.AlterField(
+            model_name='reviewimage',
+            name='image',
+            field=models.ImageField(storage=cloudinary_storage.storage.MediaCloudinaryStorage(), upload_to='reviews/'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating', 'id'], name='product_rating_id_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# The search vector is a stored generated column with a GIN index. It only
+# exists on PostgreSQL; other backends use the icontains fallback in
+# gadjet_shop.search.
+
+ADD_SEARCH_VECTOR = [
+    """
+    ALTER TABLE gadjet_shop_product
+        ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(brand, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+    """,
+    "CREATE INDEX product_search_vector_idx ON gadjet_shop_product USING GIN (search_vector)",
+]
+
+DROP_SEARCH_VECTOR = [
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "ALTER TABLE gadjet_shop_product DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in ADD_SEARCH_VECTOR:
+            schema_editor.execute(statement)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in DROP_SEARCH_VECTOR:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0004_product_review_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
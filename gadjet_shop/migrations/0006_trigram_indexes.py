@@ -0,0 +1,41 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Django compiles `field__icontains` on PostgreSQL to
+# UPPER("field"::text) LIKE UPPER('%term%'), so the trigram indexes are built
+# on that exact expression for the planner to pick them up.
+TRIGRAM_INDEXES = [
+    ("product_brand_trgm_idx", "gadjet_shop_product", "brand"),
+    ("product_name_trgm_idx", "gadjet_shop_product", "name"),
+    ("category_name_trgm_idx", "gadjet_shop_category", "name"),
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING GIN ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0005_product_search_vector'),
+    ]
+
+    operations = [
+        # No-op on backends other than PostgreSQL
+        TrigramExtension(),
+        migrations.RunPython(add_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0006_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def backfill_hero_images(apps, schema_editor):
+    Product = apps.get_model('gadjet_shop', 'Product')
+    ProductImage = apps.get_model('gadjet_shop', 'ProductImage')
+    images = ProductImage.objects.filter(product_id=OuterRef('pk'))
+    Product.objects.update(
+        hero_image=Subquery(images.order_by('-is_hero', 'order', 'id').values('id')[:1]),
+        has_hero=Exists(images.filter(is_hero=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0007_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='has_hero',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='hero_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gadjet_shop.productimage'),
+        ),
+        migrations.RunPython(backfill_hero_images, migrations.RunPython.noop),
+    ]
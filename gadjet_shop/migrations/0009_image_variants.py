@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:51
+
+import gadjet_shop.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0008_product_hero_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reviewimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(storage=gadjet_shop.storage.get_image_storage, upload_to='products/'),
+        ),
+        migrations.AlterField(
+            model_name='reviewimage',
+            name='image',
+            field=models.ImageField(storage=gadjet_shop.storage.get_image_storage, upload_to='reviews/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:53
+
+import gadjet_shop.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='staged_image',
+            field=models.FileField(blank=True, editable=False, storage=gadjet_shop.storage.get_staging_storage, upload_to='products/'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending upload'), ('ready', 'Ready'), ('failed', 'Upload failed')], db_index=True, default='ready', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(blank=True, storage=gadjet_shop.storage.get_image_storage, upload_to='products/'),
+        ),
+    ]
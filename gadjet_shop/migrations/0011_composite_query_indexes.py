@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0010_productimage_upload_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand', 'price'], name='product_brand_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['product', '-created_at', '-id'], name='review_approved_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_created_at(apps, schema_editor):
+    # Best available approximation for rows that predate the column
+    Product = apps.get_model('gadjet_shop', 'Product')
+    Product.objects.update(created_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0011_composite_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.PositiveBigIntegerField()),
+                ('slug', models.SlugField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0012_product_created_at_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCoPurchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('orders', models.PositiveIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_purchases', to='gadjet_shop.product')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gadjet_shop.product')),
+            ],
+            options={
+                'ordering': ['product', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'rank'), name='copurchase_product_rank_uniq')],
+            },
+        ),
+    ]
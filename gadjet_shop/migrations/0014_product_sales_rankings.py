@@ -0,0 +1,83 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_sales(apps, schema_editor):
+    # Rankings themselves come from `manage.py refresh_sales_rankings`
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    ProductDailySales = apps.get_model('gadjet_shop', 'ProductDailySales')
+    rows = (
+        OrderItem.objects
+        .exclude(order__status='cancelled')
+        .annotate(day=TruncDate('order__created_at'))
+        .values('product_id', 'day')
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField())),
+        )
+        .order_by()
+    )
+    ProductDailySales.objects.bulk_create(
+        (ProductDailySales(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0013_product_copurchase'),
+        ('orders', '0002_composite_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='bestseller_units',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-bestseller_units', '-id'], name='product_bestseller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-trending_score', '-id'], name='product_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-bestseller_units'], name='product_cat_bestseller_idx'),
+        ),
+        migrations.AddField(
+            model_name='productdailysales',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='gadjet_shop.product'),
+        ),
+        migrations.AddIndex(
+            model_name='productdailysales',
+            index=models.Index(fields=['day', 'product'], name='dailysales_day_product_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productdailysales',
+            constraint=models.UniqueConstraint(fields=('product', 'day'), name='dailysales_product_day_uniq'),
+        ),
+        migrations.RunPython(backfill_daily_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0014_product_sales_rankings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved_stock',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
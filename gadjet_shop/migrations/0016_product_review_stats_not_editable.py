@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0015_product_reserved_stock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
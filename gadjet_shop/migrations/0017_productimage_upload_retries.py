@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0016_product_review_stats_not_editable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='upload_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending upload'), ('uploading', 'Uploading'), ('ready', 'Ready'), ('failed', 'Upload failed')], db_index=True, default='ready', max_length=10),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gadjet_shop', '0017_productimage_upload_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='variants_pending',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reviewimage',
+            name='variants_pending',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 from django.conf import settings
-from cloudinary_storage.storage import MediaCloudinaryStorage
+from .storage import get_image_storage, get_staging_storage
 
 # ------------------------------
 # Category model
@@ -29,9 +30,60 @@ class Product(models.Model):
     slug = models.SlugField(unique=True)
     category = models.ForeignKey(Category, related_name="products", on_delete=models.CASCADE)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    rating = models.FloatField(default=0)
+    # Average of approved review ratings, maintained by gadjet_shop.services.reviews
+    rating = models.FloatField(default=0, editable=False)
     staff_rating = models.FloatField(default=0)
     stock = models.PositiveIntegerField(default=0)
+    # Units held by carts (cart.StockReservation); stock - reserved_stock is
+    # what is still available to sell. Maintained by cart.services.reservations
+    reserved_stock = models.PositiveIntegerField(default=0, editable=False)
+
+    # Approved review aggregates (kept in sync incrementally)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Image shown on cards and in the cart: the is_hero image, otherwise the
+    # first image. Kept in sync by gadjet_shop.services.images.sync_hero_image
+    hero_image = models.ForeignKey(
+        "ProductImage",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    has_hero = models.BooleanField(default=False, db_index=True, editable=False)
+
+    # Sales rankings (?ordering=bestselling / trending), bumped at checkout
+    # and recomputed from ProductDailySales by `manage.py refresh_sales_rankings`
+    bestseller_units = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Bumped on any change that alters the product's API representation
+    # (including images, approved reviews and stock); used for ETags and
+    # ?updated_since= delta sync
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (ordering field, id)
+            models.Index(fields=["price", "id"], name="product_price_id_idx"),
+            models.Index(fields=["rating", "id"], name="product_rating_id_idx"),
+            # Filtered listings sorted by price (?category__name= / ?brand=)
+            models.Index(fields=["category", "price"], name="product_category_price_idx"),
+            models.Index(fields=["brand", "price"], name="product_brand_price_idx"),
+            # Delta sync seeks on (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="product_updated_id_idx"),
+            # ?ordering=bestselling / trending, optionally within a category
+            models.Index(fields=["-bestseller_units", "-id"], name="product_bestseller_idx"),
+            models.Index(fields=["-trending_score", "-id"], name="product_trending_idx"),
+            models.Index(fields=["category", "-bestseller_units"], name="product_cat_bestseller_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -41,16 +93,104 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def available_stock(self):
+        """Stock not held by carts."""
+        return max(self.stock - self.reserved_stock, 0)
+
+    @property
+    def rating_histogram(self):
+        """Approved review count per star, e.g. {"1": 0, ..., "5": 12}."""
+        return {str(star): getattr(self, f"rating_{star}_count") for star in range(1, 6)}
+
+
+# ------------------------------
+# Deleted products, reported to ?updated_since= delta sync clients
+# ------------------------------
+class ProductTombstone(models.Model):
+    product_id = models.PositiveBigIntegerField()
+    slug = models.SlugField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.slug} (deleted {self.deleted_at:%Y-%m-%d})"
+
+
+# ------------------------------
+# Units sold per product per day (rollup read model for rankings)
+# ------------------------------
+class ProductDailySales(models.Model):
+    product = models.ForeignKey(Product, related_name="daily_sales", on_delete=models.CASCADE)
+    day = models.DateField()
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "day"], name="dailysales_product_day_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["day", "product"], name="dailysales_day_product_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.units}"
+
+
+# ------------------------------
+# "Frequently bought together": top-K co-purchased products per product,
+# written by `manage.py build_copurchases`
+# ------------------------------
+class ProductCoPurchase(models.Model):
+    product = models.ForeignKey(Product, related_name="co_purchases", on_delete=models.CASCADE)
+    related = models.ForeignKey(Product, related_name="+", on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    # Orders containing both products
+    orders = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["product", "rank"], name="copurchase_product_rank_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.related_id} (#{self.rank})"
+
 
 # ------------------------------
 # Product Image model
 # ------------------------------
 class ProductImage(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending upload"),
+        ("uploading", "Uploading"),
+        ("ready", "Ready"),
+        ("failed", "Upload failed"),
+    ]
+
     product = models.ForeignKey(Product, related_name="images", on_delete=models.CASCADE)
     image = models.ImageField(
         upload_to="products/",
-        storage=MediaCloudinaryStorage()  # Cloudinary storage
+        storage=get_image_storage,  # Cloudinary unless settings.IMAGE_STORAGE says otherwise
+        blank=True,  # empty while the upload is pending
+    )
+    # Admin uploads land here first; the background worker moves them to `image`
+    staged_image = models.FileField(
+        upload_to="products/",
+        storage=get_staging_storage,
+        blank=True,
+        editable=False,
     )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="ready", db_index=True)
+    # Upload attempts so far, and when the row may next be claimed: the end
+    # of the retry backoff for pending rows, the claim lease for uploading ones
+    upload_attempts = models.PositiveSmallIntegerField(default=0, editable=False)
+    retry_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Responsive renditions: {"thumb": {"width", "height", "webp", "jpeg"}, ...}
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    # New file waiting for `manage.py process_image_uploads` to render its variants
+    variants_pending = models.BooleanField(default=False, db_index=True, editable=False)
     is_hero = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
 
@@ -77,7 +217,9 @@ class Review(models.Model):
         null=True,
         blank=True
     )
-    rating = models.PositiveSmallIntegerField()
+    rating = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)]
+    )
     comment = models.TextField()
     is_approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -85,6 +227,15 @@ class Review(models.Model):
     class Meta:
         ordering = ["-created_at"]
         unique_together = ("product", "user")
+        indexes = [
+            # ReviewListAPIView and the product detail: a product's approved
+            # reviews, newest first. Pending reviews stay out of the index
+            models.Index(
+                fields=["product", "-created_at", "-id"],
+                name="review_approved_idx",
+                condition=models.Q(is_approved=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} → {self.product.name}"
@@ -97,8 +248,10 @@ class ReviewImage(models.Model):
     review = models.ForeignKey(Review, related_name="images", on_delete=models.CASCADE)
     image = models.ImageField(
         upload_to="reviews/",
-        storage=MediaCloudinaryStorage()  # Cloudinary storage
+        storage=get_image_storage  # Cloudinary unless settings.IMAGE_STORAGE says otherwise
     )
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    variants_pending = models.BooleanField(default=False, db_index=True, editable=False)
 
     def __str__(self):
         return f"Review Image for {self.review.user.email} → {self.review.product.name}"
@@ -0,0 +1,140 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+# ----------------------------------
+# Keyset (cursor) pagination
+# ----------------------------------
+class KeysetPagination(BasePagination):
+    """
+    Seek-based pagination: the cursor holds the ordering values of the last
+    row on the page and the next page is fetched with a WHERE on those values,
+    so every page costs O(page size) no matter how deep it is. No COUNT(*).
+
+    Ordering comes from the queryset (e.g. set by OrderingFilter) and the
+    unique `tiebreaker` field is appended so the ordering is total.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    tiebreaker = "id"
+    default_ordering = ("id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.seek_filter(cursor))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_ordering(self, queryset):
+        ordering = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str)
+        ] or list(self.default_ordering)
+        if self.tiebreaker not in [field.lstrip("-") for field in ordering]:
+            descending = ordering[0].startswith("-")
+            ordering.append(f"-{self.tiebreaker}" if descending else self.tiebreaker)
+        return ordering
+
+    def seek_filter(self, values):
+        """
+        Row-value comparison (a, b) > (x, y) spelled out as
+        a > x OR (a = x AND b > y), honouring each field's direction.
+        """
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal_so_far = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal_so_far & Q(**{f"{name}__{lookup}": value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def get_cursor_values(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+            values.append(value if isinstance(value, (int, float)) else str(value))
+        return values
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.get_cursor_values(self.page[-1]))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class ProductDeltaPagination(KeysetPagination):
+    """Pages of ?updated_since= delta sync, oldest change first."""
+    default_ordering = ("updated_at",)
+
+
+class ProductKeysetPagination(KeysetPagination):
+    default_ordering = ("price",)
+
+    @staticmethod
+    def is_requested(request):
+        """Clients opt in with ?pagination=cursor; next links carry ?cursor=."""
+        params = request.query_params
+        return params.get("pagination") == "cursor" or "cursor" in params
+
+
+class ReviewKeysetPagination(KeysetPagination):
+    """A product's review history, newest first."""
+    default_ordering = ("-created_at",)
@@ -0,0 +1,51 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Category
+
+SEARCH_CONFIG = "english"
+
+# Stored, GIN-indexed tsvector over name (A), brand (B) and description (C).
+# Created by migration 0005 on PostgreSQL only, so it is not a model field.
+SEARCH_VECTOR_COLUMN = '"gadjet_shop_product"."search_vector"'
+
+
+def search_products(queryset, query):
+    """
+    Filter products matching `query` across name, brand, description and
+    category name, annotating each row with `search_rank`.
+
+    PostgreSQL matches against the indexed search_vector column; other
+    backends (SQLite in tests) fall back to icontains with a flat rank.
+    """
+    if connection.vendor == "postgresql":
+        search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+        document = RawSQL(SEARCH_VECTOR_COLUMN, [], output_field=SearchVectorField())
+        # Categories are few, so matching them separately keeps the product
+        # side on the GIN index plus the category_id index
+        category_ids = (
+            Category.objects
+            .annotate(document=SearchVector("name", config=SEARCH_CONFIG))
+            .filter(document=search_query)
+            .values("id")
+        )
+        return (
+            queryset
+            .annotate(search_document=document)
+            .filter(Q(search_document=search_query) | Q(category_id__in=category_ids))
+            .annotate(search_rank=SearchRank(document, search_query))
+        )
+
+    return queryset.filter(
+        Q(name__icontains=query)
+        | Q(brand__icontains=query)
+        | Q(description__icontains=query)
+        | Q(category__name__icontains=query)
+    ).annotate(search_rank=Value(1.0, output_field=FloatField()))
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import Product, ProductImage, Review, ReviewImage, Category
 from django.contrib.auth import get_user_model
-from orders.models import OrderItem  # to check if user bought the product
+from .services.purchases import can_review, review_eligibility
+from .services.variants import variant_urls
 
 User = get_user_model()
 
@@ -15,22 +16,45 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug']
 
 
+# ------------------------------
+# Responsive image fields (variants + srcset)
+# ------------------------------
+def responsive_urls(image, request):
+    """variant_urls() of an image, built once per loaded instance."""
+    if not hasattr(image, "_responsive_urls"):
+        image._responsive_urls = variant_urls(image, request)
+    return image._responsive_urls
+
+
+class ResponsiveImageSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
+    def get_variants(self, obj):
+        responsive = responsive_urls(obj, self.context.get("request"))
+        return responsive["variants"] if responsive else None
+
+    def get_srcset(self, obj):
+        responsive = responsive_urls(obj, self.context.get("request"))
+        return responsive["srcset"] if responsive else None
+
+
 # ------------------------------
 # Product Image Serializer
 # ------------------------------
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(ResponsiveImageSerializer):
     class Meta:
         model = ProductImage
-        fields = ['image']
+        fields = ['image', 'variants', 'srcset']
 
 
 # ------------------------------
 # Review Image Serializer
 # ------------------------------
-class ReviewImageSerializer(serializers.ModelSerializer):
+class ReviewImageSerializer(ResponsiveImageSerializer):
     class Meta:
         model = ReviewImage
-        fields = ['image']
+        fields = ['image', 'variants', 'srcset']
 
 
 # ------------------------------
@@ -54,20 +78,18 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         request = self.context.get('request')
         user = getattr(request, 'user', None)
-        product = attrs.get('product')
+        # `product` is read-only; the view passes the target product in the context
+        product = self.context.get('product')
 
         if user is None or not user.is_authenticated:
             raise serializers.ValidationError("Authentication required to submit a review.")
 
-        # Check if user has purchased this product
-        has_bought = OrderItem.objects.filter(
-            order__user=user,
-            order__status__in=['pending', 'processing', 'shipped', 'delivered'],
-            product=product
-        ).exists()
-
-        if not has_bought:
+        # Cached per-user purchase/review sets (gadjet_shop.services.purchases)
+        eligibility = review_eligibility(user.id)
+        if product is None or product.id not in eligibility['purchased']:
             raise serializers.ValidationError("You can only review products you have purchased.")
+        if product.id in eligibility['reviewed']:
+            raise serializers.ValidationError("You have already reviewed this product.")
 
         return attrs
 
@@ -79,11 +101,15 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 
 # ------------------------------
-# Product Serializer (nested reviews)
+# Product Serializer (newest reviews + star histogram)
 # ------------------------------
 class ProductSerializer(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
+    # Units not held by carts, i.e. what can still be bought
+    stock = serializers.IntegerField(source="available_stock", read_only=True)
     reviews = serializers.SerializerMethodField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    can_review = serializers.SerializerMethodField()
     category = CategorySerializer(read_only=True)
 
     class Meta:
@@ -97,6 +123,9 @@ class ProductSerializer(serializers.ModelSerializer):
             'category',
             'price',
             'rating',
+            'review_count',
+            'rating_histogram',
+            'can_review',
             'staff_rating',
             'stock',
             'images',
@@ -104,6 +133,58 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
     def get_reviews(self, obj):
-        # Only approved reviews
-        reviews = Review.objects.filter(product=obj, is_approved=True).select_related("user")
-        return ReviewSerializer(reviews, many=True).data
+        # Newest approved reviews only, prefetched by the view into
+        # `recent_reviews`; the full history is paged by ReviewListAPIView
+        return ReviewSerializer(obj.recent_reviews, many=True).data
+
+    def get_can_review(self, obj):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if not user or not user.is_authenticated:
+            return False
+        # One cache read per response, shared by every product on a page
+        if "review_eligibility" not in self.context:
+            self.context["review_eligibility"] = review_eligibility(user.id)
+        return can_review(user, obj.id, self.context["review_eligibility"])
+
+
+# ------------------------------
+# Product Card Serializer (compact, for grids)
+# ------------------------------
+class ProductCardSerializer(serializers.ModelSerializer):
+    stock = serializers.IntegerField(source="available_stock", read_only=True)
+    hero_image = serializers.SerializerMethodField()
+    hero_srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id',
+            'name',
+            'brand',
+            'slug',
+            'price',
+            'rating',
+            'review_count',
+            'stock',
+            'hero_image',
+            'hero_srcset',
+        ]
+
+    def get_hero_image(self, obj):
+        # Denormalized hero (or first) image, loaded with select_related;
+        # the card-sized rendition when variants exist
+        hero = obj.hero_image
+        if not hero:
+            return None
+        request = self.context.get("request")
+        responsive = responsive_urls(hero, request)
+        if responsive and "card" in responsive["variants"]:
+            return responsive["variants"]["card"]["jpeg"]
+        if request:
+            return request.build_absolute_uri(hero.image.url)
+        return hero.image.url
+
+    def get_hero_srcset(self, obj):
+        responsive = obj.hero_image and responsive_urls(obj.hero_image, self.context.get("request"))
+        return responsive["srcset"] if responsive else None
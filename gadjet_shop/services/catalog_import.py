@@ -0,0 +1,200 @@
+# gadjet_shop/services/catalog_import.py
+
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from gadjet_shop.models import Category, Product
+
+# Columns written on insert and on conflict (upsert by slug). Review
+# aggregates, hero image and staff rating are left alone on update.
+UPSERT_FIELDS = ["name", "description", "brand", "category", "price", "stock", "updated_at"]
+
+SLUG_MAX_LENGTH = Product._meta.get_field("slug").max_length
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def read_rows(stream, fmt):
+    """Yield one dict per CSV row / JSON line without reading the whole file."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def build_product(row):
+    """
+    Validate an input row and return an unsaved Product plus its category
+    name. The slug is left empty for rows without one (see assign_slugs).
+    """
+    if not isinstance(row, dict):
+        raise ImportRowError("not a JSON object")
+    name = (row.get("name") or "").strip()
+    category = (row.get("category") or "").strip()
+    if not name or not category:
+        raise ImportRowError("name and category are required")
+
+    slug = ""
+    if row.get("slug"):
+        slug = slugify(row["slug"])
+        if not slug or len(slug) > SLUG_MAX_LENGTH:
+            raise ImportRowError(f"invalid slug {row['slug']!r}")
+    elif not slugify(name):
+        raise ImportRowError(f"cannot derive a slug from {name!r}")
+
+    try:
+        price = Decimal(str(row.get("price")))
+        stock = int(row.get("stock") or 0)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ImportRowError("price must be a number and stock an integer")
+    if not price.is_finite() or price < 0 or stock < 0:
+        raise ImportRowError("price and stock must not be negative")
+
+    product = Product(
+        name=name,
+        slug=slug,
+        description=row.get("description") or "",
+        brand=(row.get("brand") or "").strip(),
+        price=price,
+        stock=stock,
+    )
+    return product, category
+
+
+def derived_slugs(product):
+    """Slugs tried for a row without one: from the name, then name and brand."""
+    candidates = [slugify(product.name)[:SLUG_MAX_LENGTH].strip("-")]
+    qualified = slugify(f"{product.name} {product.brand}")[:SLUG_MAX_LENGTH].strip("-")
+    if qualified not in candidates:
+        candidates.append(qualified)
+    return candidates
+
+
+def assign_slugs(entries):
+    """
+    Pick the upsert slug of each (product, category, line) entry in a batch.
+
+    A row without a slug takes the first of derived_slugs() that no other
+    row of the batch uses and that no product of another brand owns in the
+    database, so re-importing a sheet finds the same products again. One
+    INSERT ... ON CONFLICT cannot touch a row twice, so a repeated slug or
+    name + brand within the batch is an error. Returns (entries, errors).
+    """
+    candidates = set()
+    for product, _, _ in entries:
+        candidates.update([product.slug] if product.slug else derived_slugs(product))
+    owners = dict(Product.objects.filter(slug__in=candidates).values_list("slug", "brand"))
+
+    used = {}
+    identities = {}
+    kept, errors = [], []
+    for product, category, line in entries:
+        if product.slug:
+            if product.slug in used:
+                errors.append((line, f"slug {product.slug!r} is already used by row {used[product.slug]}"))
+                continue
+        else:
+            identity = (product.name.lower(), product.brand.lower())
+            if identity in identities:
+                errors.append((line, f"duplicate of row {identities[identity]}"))
+                continue
+            identities[identity] = line
+            product.slug = next(
+                (
+                    slug for slug in derived_slugs(product)
+                    if slug not in used and owners.get(slug, product.brand).lower() == product.brand.lower()
+                ),
+                "",
+            )
+            if not product.slug:
+                errors.append((line, f"no free slug for {product.name!r}; give the row a slug"))
+                continue
+        used[product.slug] = line
+        kept.append((product, category, line))
+    return kept, errors
+
+
+class CategoryResolver:
+    """
+    Category name -> id, filled lazily. Unknown names are created with one
+    bulk INSERT per batch; the map is bounded by the number of categories.
+    """
+
+    def __init__(self):
+        self.ids = dict(Category.objects.values_list("name", "id"))
+
+    def resolve(self, names):
+        missing = set(names) - self.ids.keys()
+        if missing:
+            Category.objects.bulk_create(
+                [Category(name=name, slug=slugify(name)) for name in missing],
+                ignore_conflicts=True,
+            )
+            self.ids.update(Category.objects.filter(name__in=missing).values_list("name", "id"))
+        return self.ids
+
+
+def import_products(rows, batch_size=1000):
+    """
+    Upsert products by slug from an iterable of row dicts, `batch_size`
+    rows at a time, each batch in its own transaction. Rows without a slug
+    get a stable one (see assign_slugs). Only one batch is held in memory.
+    Yields (rows_read, upserted, errors) per batch, where
+    errors is a list of (row number, message).
+
+    Bypasses Product.save() and model signals; the caller is responsible
+    for invalidating the catalog cache afterwards.
+    """
+    categories = CategoryResolver()
+    rows = iter(rows)
+    line = 0
+
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+
+        products = []
+        errors = []
+        for row in chunk:
+            line += 1
+            try:
+                product, category = build_product(row)
+            except ImportRowError as exc:
+                errors.append((line, str(exc)))
+                continue
+            products.append((product, category, line))
+
+        with transaction.atomic():
+            products, slug_errors = assign_slugs(products)
+            errors.extend(slug_errors)
+            category_ids = categories.resolve({category for _, category, _ in products})
+            batch = []
+            for product, category, row_line in products:
+                if category not in category_ids:
+                    errors.append((row_line, f"category {category!r} clashes with an existing slug"))
+                    continue
+                product.category_id = category_ids[category]
+                batch.append(product)
+
+            Product.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["slug"],
+                update_fields=UPSERT_FIELDS,
+            )
+
+        yield len(chunk), len(batch), errors
@@ -0,0 +1,179 @@
+# gadjet_shop/services/copurchase.py
+
+import os
+import tempfile
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from scipy import sparse
+
+from gadjet_shop.models import ProductCoPurchase
+from orders.models import Order, OrderItem
+
+# Ids are handed out before commit, so a lower id can become visible after
+# a higher one was folded in. Orders are re-scanned until they are this old,
+# and the ones already folded in are remembered until then
+RESCAN_WINDOW = timedelta(hours=1)
+
+
+class CoPurchaseMatrix:
+    """
+    Symmetric product x product matrix of how many orders contain both
+    products (the diagonal holds each product's order count). Indices are
+    product ids. Every order up to `last_order_id` has been considered;
+    `recent_order_ids` are the orders above it already folded in.
+    """
+
+    def __init__(self, counts=None, last_order_id=0, recent_order_ids=()):
+        self.counts = counts if counts is not None else sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.last_order_id = last_order_id
+        self.recent_order_ids = set(recent_order_ids)
+
+    @classmethod
+    def load(cls, path=None):
+        """The saved state, or an empty matrix (full rebuild) if there is none."""
+        path = path or settings.COPURCHASE_STATE_PATH
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as state:
+            counts = sparse.csr_matrix(
+                (state["data"], state["indices"], state["indptr"]),
+                shape=tuple(state["shape"]),
+            )
+            recent = state["recent_order_ids"].tolist() if "recent_order_ids" in state else ()
+            return cls(counts, int(state["last_order_id"]), recent)
+
+    def save(self, path=None):
+        path = path or settings.COPURCHASE_STATE_PATH
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename, so a crash never leaves a half-written state
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        with os.fdopen(fd, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                data=self.counts.data,
+                indices=self.counts.indices,
+                indptr=self.counts.indptr,
+                shape=np.array(self.counts.shape),
+                last_order_id=np.array(self.last_order_id),
+                recent_order_ids=np.array(sorted(self.recent_order_ids), dtype=np.int64),
+            )
+        os.replace(tmp_path, path)
+
+    def add_orders(self, order_ids, product_ids):
+        """
+        Fold in order lines given as parallel arrays. Builds the binary
+        order x product incidence matrix A and adds A.T @ A.
+        """
+        orders, rows = np.unique(order_ids, return_inverse=True)
+        size = max(self.counts.shape[0], int(product_ids.max()) + 1)
+        incidence = sparse.csr_matrix(
+            (np.ones(len(product_ids), dtype=np.int64), (rows, product_ids)),
+            shape=(len(orders), size),
+        )
+        # A product listed twice in one order still counts once
+        incidence.data[:] = 1
+
+        if self.counts.shape[0] < size:
+            self.counts.resize((size, size))
+        self.counts = (self.counts + incidence.T @ incidence).tocsr()
+        self.recent_order_ids.update(orders.tolist())
+
+    def settle(self, order_id):
+        """Every order up to `order_id` has been considered; forget their ids."""
+        self.last_order_id = max(self.last_order_id, order_id)
+        self.recent_order_ids = {order for order in self.recent_order_ids if order > self.last_order_id}
+
+    def top_related(self, product_id, k):
+        """[(related product id, shared orders), ...], most shared first."""
+        if product_id >= self.counts.shape[0]:
+            return []
+        start, end = self.counts.indptr[product_id], self.counts.indptr[product_id + 1]
+        related = self.counts.indices[start:end]
+        shared = self.counts.data[start:end]
+        keep = related != product_id
+        related, shared = related[keep], shared[keep]
+        # Most shared orders first, lower id on ties
+        best = np.lexsort((related, -shared))[:k]
+        return [(int(related[i]), int(shared[i])) for i in best]
+
+
+def new_order_lines(matrix, batch_size):
+    """
+    Yield (order ids, product ids) arrays for non-cancelled orders above
+    matrix.last_order_id that are not folded in yet, `batch_size` orders
+    at a time.
+    """
+    last_id = matrix.last_order_id
+    while True:
+        order_ids = list(
+            Order.objects
+            .filter(id__gt=last_id)
+            .exclude(status="cancelled")
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not order_ids:
+            return
+        last_id = order_ids[-1]
+        order_ids = [order_id for order_id in order_ids if order_id not in matrix.recent_order_ids]
+        lines = OrderItem.objects.filter(order_id__in=order_ids).values_list("order_id", "product_id")
+        pairs = np.array(list(lines), dtype=np.int64).reshape(-1, 2)
+        if len(pairs):
+            yield pairs[:, 0], pairs[:, 1]
+
+
+def write_top_related(matrix, product_ids, k, batch_size=1000):
+    """Replace the stored top-k rows of the given products from the matrix."""
+    product_ids = sorted(product_ids)
+    for offset in range(0, len(product_ids), batch_size):
+        chunk = product_ids[offset:offset + batch_size]
+        rows = [
+            ProductCoPurchase(product_id=product_id, related_id=related_id, rank=rank, orders=shared)
+            for product_id in chunk
+            for rank, (related_id, shared) in enumerate(matrix.top_related(product_id, k), start=1)
+        ]
+        with transaction.atomic():
+            ProductCoPurchase.objects.filter(product_id__in=chunk).delete()
+            ProductCoPurchase.objects.bulk_create(rows)
+
+
+def build_copurchases(k=10, full=False, batch_size=5000, path=None):
+    """
+    Fold orders placed since the last run into the saved co-purchase matrix
+    and rewrite the top-k rows of every product they touched. Only pairs
+    that share a new order can change, so untouched products keep their rows.
+
+    Cancellations after an order was counted are not subtracted; run with
+    full=True now and then to rebuild from scratch.
+    Returns (orders folded in, products rewritten).
+    """
+    matrix = CoPurchaseMatrix() if full else CoPurchaseMatrix.load(path)
+    rebuild = matrix.last_order_id == 0 and not matrix.recent_order_ids
+    # Orders created before the window are all committed, and scanned below
+    settled = Order.objects.filter(
+        id__gt=matrix.last_order_id, created_at__lt=timezone.now() - RESCAN_WINDOW,
+    ).aggregate(last=Max("id"))["last"]
+
+    orders = 0
+    touched = set()
+    for order_ids, product_ids in new_order_lines(matrix, batch_size):
+        matrix.add_orders(order_ids, product_ids)
+        orders += len(np.unique(order_ids))
+        touched.update(product_ids.tolist())
+    if settled:
+        matrix.settle(settled)
+
+    write_top_related(matrix, touched, k)
+    if rebuild:
+        # Rows are replaced product by product above so the endpoint never
+        # goes empty; drop whatever the rebuild did not rewrite
+        stale = set(ProductCoPurchase.objects.values_list("product_id", flat=True).distinct()) - touched
+        ProductCoPurchase.objects.filter(product_id__in=stale).delete()
+    matrix.save(path)
+    return orders, len(touched)
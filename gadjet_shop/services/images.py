@@ -0,0 +1,23 @@
+# gadjet_shop/services/images.py
+
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from gadjet_shop.models import Product, ProductImage
+
+
+def hero_image_updates():
+    """
+    Update expressions that recompute Product.hero_image / has_hero from the
+    product's images inside the UPDATE itself (no read-modify-write race).
+    """
+    # Pending uploads have no public file yet
+    images = ProductImage.objects.filter(product_id=OuterRef("pk"), status="ready")
+    return {
+        "hero_image": Subquery(images.order_by("-is_hero", "order", "id").values("id")[:1]),
+        "has_hero": Exists(images.filter(is_hero=True)),
+    }
+
+
+def sync_hero_image(product_id: int) -> None:
+    Product.objects.filter(pk=product_id).update(updated_at=timezone.now(), **hero_image_updates())
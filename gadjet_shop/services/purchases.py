@@ -0,0 +1,79 @@
+# gadjet_shop/services/purchases.py
+
+import time
+
+from django.core.cache import cache
+
+from gadjet_shop.models import Review
+from orders.models import OrderItem
+
+# Orders in these states make their products reviewable
+PURCHASE_STATUSES = ["pending", "processing", "shipped", "delivered"]
+
+ELIGIBILITY_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(user_id):
+    return f"review-eligibility:{user_id}:version"
+
+
+def eligibility_version(user_id):
+    """
+    Per-user generation counter, bumped whenever the user's orders or
+    reviews change. Cached sets are keyed by it, and product ETags include
+    it so can_review changes invalidate them.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old keys
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_review_eligibility(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        eligibility_version(user_id)
+
+
+def purchased_products(user_id):
+    """Ids of products the user bought in a non-cancelled order."""
+    return (
+        OrderItem.objects
+        .filter(order__user_id=user_id, order__status__in=PURCHASE_STATUSES)
+        .order_by()
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+
+
+def reviewed_products(user_id):
+    return Review.objects.filter(user_id=user_id).order_by().values_list("product_id", flat=True)
+
+
+def review_eligibility(user_id):
+    """
+    {"purchased": frozenset of product ids, "reviewed": frozenset of
+    product ids} for a user. Two small queries on a miss, then one cache
+    read per request; membership checks are O(1).
+    """
+    key = f"review-eligibility:{user_id}:{eligibility_version(user_id)}"
+    eligibility = cache.get(key)
+    if eligibility is None:
+        eligibility = {
+            "purchased": frozenset(purchased_products(user_id)),
+            "reviewed": frozenset(reviewed_products(user_id)),
+        }
+        cache.set(key, eligibility, ELIGIBILITY_TIMEOUT)
+    return eligibility
+
+
+def can_review(user, product_id, eligibility=None):
+    """Bought the product (in a non-cancelled order) and not reviewed it yet."""
+    if not user or not user.is_authenticated:
+        return False
+    eligibility = eligibility or review_eligibility(user.id)
+    return product_id in eligibility["purchased"] and product_id not in eligibility["reviewed"]
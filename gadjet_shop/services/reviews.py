@@ -0,0 +1,110 @@
+# gadjet_shop/services/reviews.py
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from gadjet_shop.cache import bump_catalog_version
+from gadjet_shop.models import Product, Review
+
+STARS = range(1, 6)
+
+
+def adjust_review_stats(product_id: int, star_deltas: dict) -> None:
+    """
+    Apply approved-review count changes to a product in one UPDATE.
+
+    `star_deltas` maps a star rating (1-5) to the change in approved
+    reviews with that rating, e.g. {4: 1} when a 4-star review is approved
+    or {4: -1, 2: 1} when an approved review moves from 4 to 2 stars.
+    The average is derived from the old counters plus the deltas, so no
+    extra read is needed and concurrent updates cannot lose increments.
+    """
+    star_deltas = {star: delta for star, delta in star_deltas.items() if delta and star in STARS}
+    if not star_deltas:
+        return
+
+    count_delta = sum(star_deltas.values())
+    sum_delta = sum(star * delta for star, delta in star_deltas.items())
+
+    rating_sum = sum(F(f"rating_{star}_count") * star for star in STARS) + sum_delta
+    new_count = F("review_count") + count_delta
+
+    updates = {
+        f"rating_{star}_count": F(f"rating_{star}_count") + delta
+        for star, delta in star_deltas.items()
+    }
+    updates["review_count"] = new_count
+    updates["rating"] = Coalesce(
+        Cast(rating_sum, FloatField()) / NullIf(new_count, 0),
+        Value(0.0),
+    )
+    updates["updated_at"] = timezone.now()
+    Product.objects.filter(pk=product_id).update(**updates)
+
+
+def approve_reviews(queryset) -> int:
+    """
+    Bulk-approve reviews (admin action) and fold them into product stats.
+    Returns the number of reviews that changed state.
+
+    The UPDATEs send no post_save, so the catalog cache is invalidated here.
+    """
+    with transaction.atomic():
+        pending = list(
+            queryset.filter(is_approved=False)
+            .select_for_update()
+            .values_list("id", "product_id", "rating")
+        )
+        if not pending:
+            return 0
+
+        Review.objects.filter(id__in=[review_id for review_id, _, _ in pending]).update(is_approved=True)
+
+        deltas = defaultdict(lambda: defaultdict(int))
+        for _, product_id, rating in pending:
+            deltas[product_id][rating] += 1
+        for product_id, star_deltas in deltas.items():
+            adjust_review_stats(product_id, star_deltas)
+        transaction.on_commit(bump_catalog_version)
+
+    return len(pending)
+
+
+def recompute_review_stats(product_ids) -> int:
+    """
+    Rebuild the aggregates of the given products from their approved
+    reviews with one grouped query and one bulk UPDATE, then invalidate the
+    catalog cache.
+    """
+    products = {product.id: product for product in Product.objects.filter(id__in=product_ids)}
+    for product in products.values():
+        product.review_count = 0
+        for star in STARS:
+            setattr(product, f"rating_{star}_count", 0)
+
+    rows = (
+        Review.objects
+        .filter(product_id__in=products.keys(), is_approved=True, rating__in=STARS)
+        .order_by()
+        .values("product_id", "rating")
+        .annotate(total=Count("id"))
+    )
+    for row in rows:
+        product = products[row["product_id"]]
+        setattr(product, f"rating_{row['rating']}_count", row["total"])
+        product.review_count += row["total"]
+
+    now = timezone.now()
+    for product in products.values():
+        product.updated_at = now
+        rating_sum = sum(star * getattr(product, f"rating_{star}_count") for star in STARS)
+        product.rating = rating_sum / product.review_count if product.review_count else 0
+
+    fields = ["review_count", "rating", "updated_at"] + [f"rating_{star}_count" for star in STARS]
+    Product.objects.bulk_update(products.values(), fields)
+    transaction.on_commit(bump_catalog_version)
+    return len(products)
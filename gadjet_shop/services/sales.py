@@ -0,0 +1,96 @@
+# gadjet_shop/services/sales.py
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from gadjet_shop.cache import bump_catalog_version
+from gadjet_shop.models import Product, ProductDailySales
+
+
+def decay_weight(day, today):
+    """Trending weight of a day's sales: 1 today, halving every half-life."""
+    return 0.5 ** ((today - day).days / settings.TRENDING_HALF_LIFE_DAYS)
+
+
+def record_sales(lines, day=None, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1, cancellations) order lines, given as
+    (product_id, quantity, unit price), from the daily rollup and the
+    products' live ranking columns. `day` is the order's date.
+
+    Call inside the checkout/cancel transaction. Missing day rows are
+    inserted empty first, ignoring conflicts, so concurrent orders of the
+    same product only ever increment an existing row.
+    """
+    today = timezone.localdate()
+    day = day or today
+    units = defaultdict(int)
+    revenue = defaultdict(Decimal)
+    for product_id, quantity, price in lines:
+        units[product_id] += quantity
+        revenue[product_id] += price * quantity
+
+    in_window = (today - day).days < settings.BESTSELLER_WINDOW_DAYS
+    weight = decay_weight(day, today)
+    if sign > 0:
+        ProductDailySales.objects.bulk_create(
+            [ProductDailySales(product_id=product_id, day=day) for product_id in units],
+            ignore_conflicts=True,
+        )
+    for product_id, sold in units.items():
+        ProductDailySales.objects.filter(product_id=product_id, day=day).update(
+            units=Greatest(F("units") + sign * sold, Value(0)),
+            revenue=F("revenue") + sign * revenue[product_id],
+        )
+
+        ranking = {"trending_score": Greatest(F("trending_score") + sign * sold * weight, Value(0.0))}
+        if in_window:
+            ranking["bestseller_units"] = Greatest(F("bestseller_units") + sign * sold, Value(0))
+        Product.objects.filter(pk=product_id).update(**ranking)
+
+
+def refresh_sales_rankings(batch_size=1000):
+    """
+    Recompute every product's bestseller units and decayed trending score
+    from the rollup, relative to today. Live checkout increments weigh new
+    sales as "today" until this runs again, so run it at least daily.
+    Returns the number of ranked products.
+    """
+    today = timezone.localdate()
+    window_start = today - timedelta(days=settings.BESTSELLER_WINDOW_DAYS - 1)
+    # Beyond ~7 half-lives a day's weight is under 1%
+    horizon = today - timedelta(days=int(settings.TRENDING_HALF_LIFE_DAYS * 7))
+
+    bestseller = defaultdict(int)
+    trending = defaultdict(float)
+    rows = (
+        ProductDailySales.objects
+        .filter(day__gte=min(window_start, horizon), units__gt=0)
+        .values_list("product_id", "day", "units")
+        .iterator(chunk_size=5000)
+    )
+    for product_id, day, units in rows:
+        if day >= window_start:
+            bestseller[product_id] += units
+        if day >= horizon:
+            trending[product_id] += units * decay_weight(day, today)
+
+    ranked = [
+        Product(id=product_id, bestseller_units=bestseller[product_id], trending_score=trending[product_id])
+        for product_id in bestseller.keys() | trending.keys()
+    ]
+    with transaction.atomic():
+        Product.objects.filter(Q(bestseller_units__gt=0) | Q(trending_score__gt=0)).update(
+            bestseller_units=0, trending_score=0,
+        )
+        Product.objects.bulk_update(ranked, ["bestseller_units", "trending_score"], batch_size=batch_size)
+        # bulk_update sends no post_save; cached rankings must not outlive it
+        transaction.on_commit(bump_catalog_version)
+    return len(ranked)
@@ -0,0 +1,135 @@
+# gadjet_shop/services/uploads.py
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from gadjet_shop.cache import bump_catalog_version
+from gadjet_shop.models import ProductImage
+from gadjet_shop.services.images import sync_hero_image
+from gadjet_shop.services.variants import generate_variants
+
+logger = logging.getLogger(__name__)
+
+
+def stage_upload(image):
+    """
+    Divert a ProductImage's pending upload to the local staging storage so
+    saving it is a fast disk write; the worker publishes it later.
+    """
+    upload = image.image
+    image.staged_image = File(upload.file, name=os.path.basename(upload.name))
+    image.image = ""
+    image.status = "pending"
+    image.upload_attempts = 0
+    image.retry_at = None
+
+
+def _publish(image):
+    """Copy one staged file to the image storage. Runs in a worker thread."""
+    try:
+        with image.staged_image.open("rb") as staged:
+            image.image.save(os.path.basename(image.staged_image.name), File(staged), save=False)
+    except Exception as exc:
+        return exc
+    return None
+
+
+def claim_uploads(batch_size):
+    """
+    Claim up to `batch_size` due uploads in a short transaction: pending
+    rows past their retry backoff and uploading rows whose worker let the
+    lease expire. SKIP LOCKED lets several workers claim side by side.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            ProductImage.objects
+            .filter(status__in=["pending", "uploading"])
+            .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        ProductImage.objects.filter(id__in=ids).update(
+            status="uploading",
+            upload_attempts=F("upload_attempts") + 1,
+            retry_at=now + timedelta(seconds=settings.IMAGE_UPLOAD_LEASE),
+        )
+    return list(ProductImage.objects.filter(id__in=ids).order_by("id"))
+
+
+def publish_pending_uploads(batch_size=20, workers=4):
+    """
+    Push up to `batch_size` pending images to storage with `workers`
+    parallel uploads, mark them ready and render their variants.
+
+    Rows are claimed first (see claim_uploads), so no transaction or row
+    lock is held during the network uploads. Results are written only while
+    the row still carries this worker's claim; a row deleted or reclaimed
+    meanwhile is skipped and the files only this worker still needs are
+    removed. A failed upload goes back to pending with a growing delay and
+    is marked failed after settings.IMAGE_UPLOAD_MAX_ATTEMPTS. Returns
+    (published, failed).
+    """
+    batch = claim_uploads(batch_size)
+    if not batch:
+        return 0, 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = list(executor.map(_publish, batch))
+
+    published = []
+    failed = 0
+    for image, error in zip(batch, errors):
+        claimed = ProductImage.objects.filter(pk=image.pk, status="uploading", retry_at=image.retry_at)
+        if error is not None:
+            logger.error("Upload of %s failed: %s", image.staged_image.name, error)
+            if image.upload_attempts >= settings.IMAGE_UPLOAD_MAX_ATTEMPTS:
+                updates = {"status": "failed", "retry_at": None}
+            else:
+                updates = {"status": "pending", "retry_at": timezone.now() + timedelta(
+                    seconds=settings.IMAGE_UPLOAD_RETRY_DELAY * image.upload_attempts
+                )}
+            if not claimed.update(**updates):
+                release_lost_claim(image)
+            failed += 1
+            continue
+
+        if not claimed.update(image=image.image.name, staged_image="", status="ready", retry_at=None):
+            image.image.delete(save=False)
+            release_lost_claim(image)
+            continue
+        image.staged_image.delete(save=False)
+        # The UPDATE sends no post_save: show the image and drop cached pages here
+        sync_hero_image(image.product_id)
+        bump_catalog_version()
+        image.status = "ready"
+        published.append(image)
+
+    generate_variants(published)
+    return len(published), failed
+
+
+def release_lost_claim(image):
+    """
+    A claimed row changed under the worker. If it was deleted nobody needs
+    its staged file any more; if another worker reclaimed it, that worker does.
+    """
+    logger.warning("Upload of %s was deleted or reclaimed; skipping", image.staged_image.name)
+    if not ProductImage.objects.filter(pk=image.pk).exists():
+        image.staged_image.delete(save=False)
+
+
+def retry_failed_uploads():
+    """Requeue uploads that ran out of attempts. Returns how many."""
+    return ProductImage.objects.filter(status="failed").update(
+        status="pending", upload_attempts=0, retry_at=None,
+    )
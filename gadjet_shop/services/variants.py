@@ -0,0 +1,149 @@
+# gadjet_shop/services/variants.py
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, transaction
+
+from gadjet_shop.imaging import VARIANT_WIDTHS, render_variant
+from gadjet_shop.models import ProductImage, ReviewImage
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+
+
+def get_pool():
+    """
+    Shared process pool for Pillow work, created on first use. Uses "spawn"
+    so workers never inherit open DB connections or locks from the parent.
+    """
+    global _pool
+    workers = settings.IMAGE_VARIANT_WORKERS
+    if workers <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def generate_variants(instances):
+    """
+    Render thumb/card/full WebP + JPEG variants for ProductImage/ReviewImage
+    rows and store them next to the original, in parallel across the pool.
+    Saves `variants` on each row; rows whose original cannot be read or
+    decoded are logged and left without variants.
+    """
+    pool = get_pool()
+    jobs = []
+    for instance in instances:
+        try:
+            with instance.image.open("rb") as original:
+                data = original.read()
+        except Exception:
+            logger.exception("Could not read %s for image variants", instance.image.name)
+            continue
+        for label, width in VARIANT_WIDTHS.items():
+            result = pool.submit(render_variant, data, width) if pool else None
+            jobs.append((instance, label, width, data, result))
+
+    rendered = {}
+    failed = set()
+    for instance, label, width, data, result in jobs:
+        try:
+            variant = result.result() if result else render_variant(data, width)
+        except Exception:
+            logger.exception("Could not render %s variant of %s", label, instance.image.name)
+            failed.add(instance)
+            continue
+        rendered.setdefault(instance, {})[label] = variant
+
+    done = []
+    for instance, variants in rendered.items():
+        if instance in failed:
+            continue
+        storage = instance.image.storage
+        base = os.path.splitext(instance.image.name)[0]
+        stored = {}
+        for label, variant in variants.items():
+            stored[label] = {
+                "width": variant["width"],
+                "height": variant["height"],
+                "webp": storage.save(f"{base}-{label}.webp", ContentFile(variant["webp"])),
+                "jpeg": storage.save(f"{base}-{label}.jpg", ContentFile(variant["jpeg"])),
+            }
+        instance.variants = stored
+        try:
+            instance.save(update_fields=["variants"])
+        except DatabaseError:
+            # The image was deleted while its variants were rendered
+            for variant in stored.values():
+                storage.delete(variant["webp"])
+                storage.delete(variant["jpeg"])
+            continue
+        done.append(instance)
+    return done
+
+
+def render_pending_variants(batch_size=20):
+    """
+    Render variants for up to `batch_size` images per model flagged
+    variants_pending by a save that uploaded a new file. Rows are claimed
+    (flag cleared) in a short SKIP LOCKED transaction, so the Pillow work
+    runs outside any transaction and workers can run side by side; a row
+    whose worker died is left without variants for
+    `manage.py generate_image_variants`. Returns the number claimed.
+    """
+    claimed = 0
+    for model, ready in ((ProductImage, {"status": "ready"}), (ReviewImage, {})):
+        with transaction.atomic():
+            ids = list(
+                model.objects.filter(variants_pending=True, **ready)
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            model.objects.filter(id__in=ids).update(variants_pending=False)
+        if ids:
+            generate_variants(list(model.objects.filter(id__in=ids).order_by("id")))
+            claimed += len(ids)
+    return claimed
+
+
+def variant_urls(instance, request=None):
+    """
+    Public URLs and dimensions of an image's variants plus WebP/JPEG srcset
+    strings, or None when the variants have not been generated.
+    """
+    if not instance.variants:
+        return None
+    storage = instance.image.storage
+
+    def url(name):
+        location = storage.url(name)
+        return request.build_absolute_uri(location) if request else location
+
+    variants = {
+        label: {
+            "width": variant["width"],
+            "height": variant["height"],
+            "webp": url(variant["webp"]),
+            "jpeg": url(variant["jpeg"]),
+        }
+        for label, variant in instance.variants.items()
+    }
+    srcset = {
+        fmt: ", ".join(
+            f"{variant[fmt]} {variant['width']}w"
+            for variant in sorted(variants.values(), key=lambda v: v["width"])
+        )
+        for fmt in ("webp", "jpeg")
+    }
+    return {"variants": variants, "srcset": srcset}
@@ -0,0 +1,136 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import Category, Product, ProductImage, ProductTombstone, Review, ReviewImage
+from .services.images import sync_hero_image
+from .services.purchases import invalidate_review_eligibility
+from .services.reviews import adjust_review_stats
+
+
+def touch_products(queryset):
+    """Bump updated_at (the products' ETag / sync version) without a save()."""
+    queryset.update(updated_at=timezone.now())
+
+
+# ------------------------------
+# Review aggregates on Product
+# ------------------------------
+def _approved_contribution(product_id, rating, is_approved):
+    """(product_id, rating) counted in the product stats, or None."""
+    if is_approved and product_id:
+        return (product_id, rating)
+    return None
+
+
+@receiver(post_init, sender=Review)
+def remember_review_state(sender, instance, **kwargs):
+    instance._stats_state = _approved_contribution(
+        instance.product_id, instance.rating, instance.is_approved
+    ) if instance.pk else None
+
+
+@receiver(post_save, sender=Review)
+def update_review_stats_on_save(sender, instance, **kwargs):
+    old = instance._stats_state
+    new = _approved_contribution(instance.product_id, instance.rating, instance.is_approved)
+    if old != new:
+        if old:
+            adjust_review_stats(old[0], {old[1]: -1})
+        if new:
+            adjust_review_stats(new[0], {new[1]: 1})
+    elif new:
+        # Edited approved review: stats unchanged, but the product's embedded
+        # reviews changed, so bump its version (ETag / delta sync)
+        touch_products(Product.objects.filter(pk=instance.product_id))
+    instance._stats_state = new
+
+
+@receiver(post_delete, sender=Review)
+def update_review_stats_on_delete(sender, instance, **kwargs):
+    if instance._stats_state:
+        product_id, rating = instance._stats_state
+        adjust_review_stats(product_id, {rating: -1})
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_eligibility_on_change(sender, instance, **kwargs):
+    # A review uses up the purchase (see orders.signals for the Order side);
+    # after commit, so a concurrent miss cannot cache the old rows
+    user_id = instance.user_id
+    if user_id:
+        transaction.on_commit(lambda: invalidate_review_eligibility(user_id))
+
+
+# ------------------------------
+# Product version (updated_at) for changes outside Product.save()
+# ------------------------------
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def sync_product_on_image_change(sender, instance, **kwargs):
+    # Also bumps updated_at
+    sync_hero_image(instance.product_id)
+
+
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def touch_product_on_review_image_change(sender, instance, **kwargs):
+    touch_products(Product.objects.filter(reviews__pk=instance.review_id, reviews__is_approved=True))
+
+
+@receiver(post_save, sender=Category)
+def touch_products_on_category_change(sender, instance, created, **kwargs):
+    if not created:
+        touch_products(Product.objects.filter(category=instance))
+
+
+# ------------------------------
+# Staged uploads deleted before the worker published them
+# ------------------------------
+@receiver(post_delete, sender=ProductImage)
+def delete_staged_upload(sender, instance, **kwargs):
+    if instance.staged_image:
+        storage, name = instance.staged_image.storage, instance.staged_image.name
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+# ------------------------------
+# Responsive image variants for new uploads
+# ------------------------------
+@receiver(pre_save, sender=ProductImage)
+@receiver(pre_save, sender=ReviewImage)
+def queue_image_variants(sender, instance, **kwargs):
+    # An uncommitted FieldFile is a file being uploaded by this save; its
+    # variants are rendered by the background worker, not in the request
+    if instance.image and not instance.image._committed:
+        instance.variants = {}
+        instance.variants_pending = True
+
+
+# ------------------------------
+# Tombstones for delta sync
+# ------------------------------
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    ProductTombstone.objects.create(product_id=instance.pk, slug=instance.slug)
+
+
+# ------------------------------
+# Catalog cache invalidation
+# ------------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def invalidate_catalog_cache(sender, **kwargs):
+    # After commit, so a concurrent miss cannot re-cache the old rows under the new version
+    transaction.on_commit(bump_catalog_version)
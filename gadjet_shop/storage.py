@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+
+
+class ImageStorage(LazyObject):
+    """
+    Storage for product and review images, chosen by settings.IMAGE_STORAGE
+    (Cloudinary in production, FileSystemStorage as a local/test stand-in).
+    Resolved lazily so override_settings() swaps it too.
+    """
+
+    def _setup(self):
+        self._wrapped = import_string(settings.IMAGE_STORAGE)()
+
+
+class StagingStorage(LazyObject):
+    """
+    Local disk area where admin uploads wait for the background worker
+    (`manage.py process_image_uploads`) to push them to the image storage.
+    """
+
+    def _setup(self):
+        self._wrapped = FileSystemStorage(location=settings.IMAGE_STAGING_ROOT)
+
+
+image_storage = ImageStorage()
+staging_storage = StagingStorage()
+
+
+def get_image_storage():
+    # Callable so migrations reference this function rather than a backend
+    return image_storage
+
+
+def get_staging_storage():
+    return staging_storage
+
+
+@receiver(setting_changed)
+def reset_image_storage(*, setting, **kwargs):
+    if setting in ("IMAGE_STORAGE", "MEDIA_ROOT", "MEDIA_URL"):
+        image_storage._wrapped = empty
+    if setting == "IMAGE_STAGING_ROOT":
+        staging_storage._wrapped = empty
@@ -1,3 +1,1240 @@
+import csv
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from unittest import mock
+
+from orders.models import Order, OrderItem
+
+from .models import Category, Product, ProductDailySales, ProductImage, Review, ReviewImage
+from .services import uploads
+from .services.copurchase import CoPurchaseMatrix
+from .services.uploads import stage_upload
+from .views import EMBEDDED_REVIEWS
+
+User = get_user_model()
+
+
+def create_catalog(products=3, images=2, reviews=2):
+    """Seed a small catalog with images and approved reviews."""
+    category = Category.objects.create(name=f"Phones {Category.objects.count()}")
+    created = []
+    for i in range(products):
+        product = Product.objects.create(
+            name=f"Phone {Product.objects.count()}",
+            description="A phone",
+            brand="Acme",
+            category=category,
+            price=100 + i,
+            stock=5,
+        )
+        for order in range(images):
+            ProductImage.objects.create(
+                product=product,
+                image=f"products/{product.slug}-{order}.jpg",
+                is_hero=order == 0,
+                order=order,
+            )
+        for _ in range(reviews):
+            user = User.objects.create_user(
+                email=f"user{User.objects.count()}@example.com", password="pass"
+            )
+            review = Review.objects.create(
+                product=product, user=user, rating=4, comment="Good", is_approved=True
+            )
+            ReviewImage.objects.create(review=review, image="reviews/r.jpg")
+        created.append(product)
+    return created
+
+
+# ------------------------------
+# Product listing query budget
+# ------------------------------
+class ProductQueryBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_query_count_is_constant(self):
+        create_catalog(products=2, images=1, reviews=1)
+        # count, products + category, images, reviews + users, review images
+        with self.assertNumQueries(5):
+            self.client.get(reverse("product-list"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_catalog(products=8, images=3, reviews=3)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("product-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(len(response.data["results"][0]["reviews"]), 1)
+
+    def test_list_excludes_unapproved_reviews(self):
+        product = create_catalog(products=1, images=1, reviews=1)[0]
+        user = User.objects.create_user(email="pending@example.com", password="pass")
+        Review.objects.create(product=product, user=user, rating=1, comment="Bad")
+
+        response = self.client.get(reverse("product-list"))
+
+        self.assertEqual(len(response.data["results"][0]["reviews"]), 1)
+
+    def test_detail_query_count_is_constant(self):
+        product = create_catalog(products=1, images=4, reviews=5)[0]
+        # ETag validators, product + category, images, reviews + users, review images
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("product-detail", args=[product.slug]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["reviews"]), 5)
+
+    def test_detail_embeds_newest_reviews_and_histogram(self):
+        product = create_catalog(products=1, images=0, reviews=8)[0]
+        newest = list(
+            Review.objects.filter(product=product).order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+        response = self.client.get(reverse("product-detail", args=[product.slug]))
+
+        self.assertEqual([review["id"] for review in response.data["reviews"]], newest[:EMBEDDED_REVIEWS])
+        self.assertEqual(sum(response.data["rating_histogram"].values()), 8)
+        self.assertEqual(response.data["review_count"], 8)
+
+    def test_review_list_keyset_pages(self):
+        product = create_catalog(products=1, images=0, reviews=25)[0]
+        url = reverse("review-list", args=[product.id])
+
+        seen = []
+        while url:
+            # ETag validators, reviews + users, review images
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            seen.extend(review["id"] for review in response.data["results"])
+            url = response.data["next"]
+
+        newest = Review.objects.filter(product=product).order_by("-created_at", "-id")
+        self.assertEqual(seen, list(newest.values_list("id", flat=True)))
+
+
+# ------------------------------
+# Product card view
+# ------------------------------
+class ProductCardViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_card_view_returns_compact_products(self):
+        create_catalog(products=3, images=2, reviews=2)
+
+        # count, products + hero image
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("product-list"), {"view": "card"})
+
+        card = response.data["results"][0]
+        self.assertEqual(
+            set(card),
+            {
+                "id", "name", "brand", "slug", "price",
+                "rating", "review_count", "stock", "hero_image", "hero_srcset",
+            },
+        )
+        self.assertIn("-0.jpg", card["hero_image"])
+
+    def test_card_view_without_images(self):
+        create_catalog(products=1, images=0, reviews=0)
+
+        response = self.client.get(reverse("product-list"), {"view": "card"})
+
+        self.assertIsNone(response.data["results"][0]["hero_image"])
+
+
+# ------------------------------
+# Keyset pagination
+# ------------------------------
+class ProductKeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        category = Category.objects.create(name="Laptops")
+        # Duplicate prices make the id tiebreaker matter
+        for i in range(25):
+            Product.objects.create(
+                name=f"Laptop {i}", description="", brand="Acme",
+                category=category, price=100 + i // 3, rating=i % 5, stock=1,
+            )
+
+    def walk(self, params):
+        seen = []
+        response = self.client.get(reverse("product-list"), params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen.extend(p["id"] for p in response.data["results"])
+            if not response.data["next"]:
+                return seen
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_pages_cover_catalog_in_order(self):
+        ids = self.walk({"pagination": "cursor", "view": "card"})
+
+        expected = list(Product.objects.order_by("price", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_cursor_pages_follow_descending_ordering(self):
+        ids = self.walk({"pagination": "cursor", "ordering": "-rating", "view": "card"})
+
+        expected = list(Product.objects.order_by("-rating", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_cursor_page_skips_count_query(self):
+        # products + hero image
+        with self.assertNumQueries(1):
+            self.client.get(reverse("product-list"), {"pagination": "cursor", "view": "card"})
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("product-list"), {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse("product-list"), {"view": "card"})
+
+        self.assertEqual(response.data["count"], 25)
+
+
+# ------------------------------
+# Review aggregates
+# ------------------------------
+class ReviewStatsTests(TestCase):
+    def setUp(self):
+        self.product = create_catalog(products=1, images=0, reviews=0)[0]
+
+    def review(self, rating, is_approved=False):
+        user = User.objects.create_user(
+            email=f"reviewer{User.objects.count()}@example.com", password="pass"
+        )
+        return Review.objects.create(
+            product=self.product, user=user, rating=rating,
+            comment="", is_approved=is_approved,
+        )
+
+    def assertStats(self, count, rating, histogram):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, count)
+        self.assertAlmostEqual(self.product.rating, rating)
+        self.assertEqual(
+            [self.product.rating_histogram[str(star)] for star in range(1, 6)], histogram
+        )
+
+    def test_approve_edit_unapprove_and_delete(self):
+        first = self.review(5, is_approved=True)
+        pending = self.review(2)
+        self.assertStats(1, 5.0, [0, 0, 0, 0, 1])
+
+        pending.is_approved = True
+        pending.save()
+        self.assertStats(2, 3.5, [0, 1, 0, 0, 1])
+
+        first = Review.objects.get(pk=first.pk)
+        first.rating = 4
+        first.save()
+        self.assertStats(2, 3.0, [0, 1, 0, 1, 0])
+
+        first.is_approved = False
+        first.save()
+        self.assertStats(1, 2.0, [0, 1, 0, 0, 0])
+
+        pending.delete()
+        first.delete()
+        self.assertStats(0, 0.0, [0, 0, 0, 0, 0])
+
+    def test_admin_bulk_approve_updates_stats(self):
+        self.review(3)
+        self.review(4)
+        self.review(5, is_approved=True)
+        review_admin = site._registry[Review]
+        review_admin.message_user = lambda *args, **kwargs: None
+
+        review_admin.approve_selected_reviews(None, Review.objects.all())
+
+        self.assertStats(3, 4.0, [0, 0, 1, 1, 1])
+
+    def test_admin_bulk_approve_invalidates_cached_product(self):
+        cache.clear()
+        client = APIClient()
+        url = reverse("product-detail", args=[self.product.slug])
+        review = self.review(5)
+        self.assertEqual(client.get(url).data["review_count"], 0)
+        review_admin = site._registry[Review]
+        review_admin.message_user = lambda *args, **kwargs: None
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review_admin.approve_selected_reviews(None, Review.objects.filter(pk=review.pk))
+
+        self.assertEqual(client.get(url).data["review_count"], 1)
+
+    def test_admin_product_save_keeps_stats(self):
+        self.review(5, is_approved=True)
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com", password="pass"))
+
+        # A form loaded before the review was approved posts stale aggregates
+        response = self.client.post(
+            reverse("admin:gadjet_shop_product_change", args=[self.product.pk]),
+            {
+                "name": self.product.name,
+                "slug": self.product.slug,
+                "description": self.product.description,
+                "brand": self.product.brand,
+                "category": self.product.category_id,
+                "price": "100.00",
+                "rating": "1",
+                "review_count": "0",
+                "rating_5_count": "0",
+                "staff_rating": "0",
+                "stock": "5",
+                "images-TOTAL_FORMS": "0",
+                "images-INITIAL_FORMS": "0",
+                "reviews-TOTAL_FORMS": "0",
+                "reviews-INITIAL_FORMS": "0",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertStats(1, 5.0, [0, 0, 0, 0, 1])
+
+    def test_recompute_command_rebuilds_stats(self):
+        self.review(1, is_approved=True)
+        self.review(3, is_approved=True)
+        self.review(5)
+        Product.objects.update(review_count=0, rating=0, rating_1_count=7)
+
+        call_command("recompute_review_stats", batch_size=1, stdout=StringIO())
+
+        self.assertStats(2, 2.0, [1, 0, 1, 0, 0])
+
+
+# ------------------------------
+# Product search
+# ------------------------------
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        phones = Category.objects.create(name="Phones")
+        audio = Category.objects.create(name="Audio")
+        self.phone = Product.objects.create(
+            name="Pixel 9", description="Android flagship with wireless charging", brand="Google",
+            category=phones, price=900,
+        )
+        self.headset = Product.objects.create(
+            name="Studio Buds", description="Wireless noise cancelling earbuds", brand="Beats",
+            category=audio, price=150,
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(reverse("product-list"), {"q": query, "view": "card", **params})
+        self.assertEqual(response.status_code, 200)
+        return [product["id"] for product in response.data["results"]]
+
+    def test_search_matches_name_brand_description_and_category(self):
+        self.assertEqual(self.search("pixel"), [self.phone.id])
+        self.assertEqual(self.search("beats"), [self.headset.id])
+        self.assertEqual(self.search("noise"), [self.headset.id])
+        self.assertEqual(self.search("phones"), [self.phone.id])
+        self.assertEqual(self.search("nothing-like-this"), [])
+
+    def test_search_with_cursor_pagination(self):
+        ids = self.search("wireless", pagination="cursor", ordering="-price")
+
+        self.assertEqual(ids, [self.phone.id, self.headset.id])
+
+
+# ------------------------------
+# Facets
+# ------------------------------
+class ProductFacetsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.phones = Category.objects.create(name="Phones")
+        audio = Category.objects.create(name="Audio")
+        for name, brand, category, price in [
+            ("Pixel", "Google", self.phones, 40000),
+            ("Galaxy", "Samsung", self.phones, 300000),
+            ("Buds", "Samsung", audio, 90000),
+        ]:
+            Product.objects.create(
+                name=name, description="", brand=brand, category=category, price=price
+            )
+
+    def test_facet_counts_follow_filters(self):
+        response = self.client.get(reverse("product-facets"), {"brand": "Samsung"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(
+            {(c["name"], c["count"]) for c in response.data["categories"]},
+            {("Phones", 1), ("Audio", 1)},
+        )
+        self.assertEqual(response.data["brands"], [{"name": "Samsung", "count": 2}])
+        self.assertEqual(
+            [bucket["count"] for bucket in response.data["price_ranges"]],
+            [0, 1, 0, 1, 0, 0],
+        )
+
+    def test_facets_are_cached_until_catalog_changes(self):
+        url = reverse("product-facets")
+        self.client.get(url, {"brand": "Google", "ordering": "price"})
+
+        # Same filter set in a different form hits the cache
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"ordering": "-price", "brand": "Google"})
+        self.assertEqual(response.data["total"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(
+                name="Pixel Pro", description="", brand="Google",
+                category=self.phones, price=60000,
+            )
+
+        response = self.client.get(url, {"brand": "Google"})
+        self.assertEqual(response.data["total"], 2)
+
+
+# ------------------------------
+# Catalog response cache
+# ------------------------------
+class CatalogResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = create_catalog(products=2, images=1, reviews=1)[0]
+
+    def test_anonymous_list_and_detail_are_served_from_cache(self):
+        detail_url = reverse("product-detail", args=[self.product.slug])
+        first_list = self.client.get(reverse("product-list"), {"brand": "Acme", "view": "card"})
+        first_detail = self.client.get(detail_url)
+
+        with self.assertNumQueries(0):
+            cached_list = self.client.get(reverse("product-list"), {"view": "card", "brand": "Acme"})
+            cached_detail = self.client.get(detail_url)
+
+        self.assertEqual(cached_list.data, first_list.data)
+        self.assertEqual(cached_detail.data, first_detail.data)
+
+    def test_image_change_invalidates_cached_responses(self):
+        url = reverse("product-detail", args=[self.product.slug])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=self.product, image="products/new.jpg", order=5)
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.data["images"]), 2)
+
+    def test_missing_detail_is_not_cached(self):
+        url = reverse("product-detail", args=["missing"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_concurrent_miss_waits_for_lock_holder(self):
+        url = reverse("product-detail", args=[self.product.slug])
+        rendered = self.client.get(url).data
+        cache.clear()
+
+        def other_worker_finishes(_):
+            cache.set("catalog:test", {"data": rendered, "headers": {}})
+
+        # Another request holds the lock and stores its result while we poll
+        with mock.patch("gadjet_shop.cache.catalog_cache_key", return_value="catalog:test"), \
+                mock.patch("gadjet_shop.cache.time.sleep", side_effect=other_worker_finishes):
+            cache.add("catalog:test:lock", 1)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+
+        self.assertEqual(response.data, rendered)
+
+    def test_waiter_stops_when_lock_holder_caches_nothing(self):
+        url = reverse("product-detail", args=["missing"])
+
+        def other_worker_gets_404(_):
+            cache.delete("catalog:test:lock")
+
+        # The lock holder renders a 404, so it releases the lock without a result
+        with mock.patch("gadjet_shop.cache.catalog_cache_key", return_value="catalog:test"), \
+                mock.patch("gadjet_shop.cache.time.sleep", side_effect=other_worker_gets_404) as sleep:
+            cache.add("catalog:test:lock", 1)
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(sleep.call_count, 1)
+
+
+# ------------------------------
+# Conditional GET
+# ------------------------------
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = create_catalog(products=1, images=1, reviews=1)[0]
+
+    def test_product_detail_not_modified(self):
+        url = reverse("product-detail", args=[self.product.slug])
+        etag = self.client.get(url)["ETag"]
+
+        # Cached response: answered from the cached validators
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Uncached: one validator query, no serialization
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_product_etag_changes_with_images_and_reviews(self):
+        url = reverse("product-detail", args=[self.product.slug])
+        etag = self.client.get(url)["ETag"]
+
+        ProductImage.objects.create(product=self.product, image="products/extra.jpg", order=9)
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        review = Review.objects.get(product=self.product)
+        review.comment = "Edited"
+        review.save()
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_list_not_modified(self):
+        url = reverse("review-list", args=[self.product.id])
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        user = User.objects.create_user(email="late@example.com", password="pass")
+        Review.objects.create(product=self.product, user=user, rating=5, comment="", is_approved=True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+# ------------------------------
+# Denormalized hero image
+# ------------------------------
+class HeroImageSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = create_catalog(products=1, images=0, reviews=0)[0]
+
+    def assertHero(self, image, has_hero):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.hero_image, image)
+        self.assertEqual(self.product.has_hero, has_hero)
+
+    def test_hero_follows_image_changes(self):
+        second = ProductImage.objects.create(product=self.product, image="products/b.jpg", order=2)
+        first = ProductImage.objects.create(product=self.product, image="products/a.jpg", order=1)
+        self.assertHero(first, False)
+
+        second.is_hero = True
+        second.save()
+        self.assertHero(second, True)
+
+        second.delete()
+        self.assertHero(first, False)
+
+        first.delete()
+        self.assertHero(None, False)
+
+    def test_is_hero_filter_uses_flag(self):
+        ProductImage.objects.create(product=self.product, image="products/a.jpg", is_hero=True)
+        create_catalog(products=1, images=0, reviews=0)
+
+        response = APIClient().get(reverse("product-list"), {"is_hero": "true", "view": "card"})
+
+        self.assertEqual([p["id"] for p in response.data["results"]], [self.product.id])
+
+
+# ------------------------------
+# Responsive image variants
+# ------------------------------
+def upload(name="photo.png", size=(2000, 1000)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class LocalImageStorageMixin:
+    """Uploads go to a throwaway FileSystemStorage instead of Cloudinary."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        overrides = override_settings(
+            IMAGE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=media_root,
+            MEDIA_URL="/media/",
+            IMAGE_STAGING_ROOT=f"{media_root}/staging",
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class ImageVariantTests(LocalImageStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.product = create_catalog(products=1, images=0, reviews=0)[0]
+
+    def render(self):
+        call_command("process_image_uploads", "--once", stdout=StringIO())
+
+    def test_upload_queues_variants_for_the_worker(self):
+        image = ProductImage.objects.create(product=self.product, image=upload())
+        review_image = ReviewImage.objects.create(
+            review=Review.objects.create(
+                product=self.product, user=User.objects.create_user(email="r@example.com", password="pass"),
+                rating=5, comment="", is_approved=True,
+            ),
+            image=upload(),
+        )
+
+        # Nothing is rendered in the request
+        image.refresh_from_db()
+        self.assertEqual((image.variants, image.variants_pending), ({}, True))
+
+        self.render()
+
+        image.refresh_from_db()
+        review_image.refresh_from_db()
+        self.assertFalse(image.variants_pending)
+        self.assertEqual(set(review_image.variants), {"thumb", "card", "full"})
+        self.assertEqual(set(image.variants), {"thumb", "card", "full"})
+        self.assertEqual((image.variants["card"]["width"], image.variants["card"]["height"]), (480, 240))
+        with image.image.storage.open(image.variants["thumb"]["webp"]) as rendered:
+            self.assertEqual(Image.open(rendered).size, (160, 80))
+
+    def test_small_originals_are_not_upscaled(self):
+        image = ProductImage.objects.create(product=self.product, image=upload(size=(300, 300)))
+        self.render()
+
+        image.refresh_from_db()
+        self.assertEqual(image.variants["full"]["width"], 300)
+
+    def test_serializers_expose_srcset(self):
+        ProductImage.objects.create(product=self.product, image=upload(), is_hero=True)
+        self.render()
+        client = APIClient()
+
+        detail = client.get(reverse("product-detail", args=[self.product.slug])).data
+        card = client.get(reverse("product-list"), {"view": "card"}).data["results"][0]
+
+        srcset = detail["images"][0]["srcset"]
+        self.assertIn("-thumb.webp 160w", srcset["webp"])
+        self.assertIn("-full.jpg 1200w", srcset["jpeg"])
+        self.assertTrue(card["hero_image"].endswith("-card.jpg"))
+        self.assertEqual(card["hero_srcset"], srcset)
+
+    def test_backfill_command(self):
+        image = ProductImage.objects.create(product=self.product, image=upload())
+        ProductImage.objects.filter(pk=image.pk).update(variants={})
+
+        call_command("generate_image_variants", stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(set(image.variants), {"thumb", "card", "full"})
+
+    @override_settings(IMAGE_VARIANT_WORKERS=0)
+    def test_unreadable_image_is_skipped(self):
+        image = ProductImage.objects.create(
+            product=self.product,
+            image=SimpleUploadedFile("broken.png", b"not an image", content_type="image/png"),
+        )
+        with self.assertLogs("gadjet_shop.services.variants", "ERROR"):
+            self.render()
+
+        image.refresh_from_db()
+        self.assertEqual(image.variants, {})
+
+
+# ------------------------------
+# Background image upload queue
+# ------------------------------
+class ImageUploadQueueTests(LocalImageStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.product = create_catalog(products=1, images=0, reviews=0)[0]
+
+    def stage(self, **kwargs):
+        image = ProductImage(product=self.product, image=upload(), **kwargs)
+        stage_upload(image)
+        image.save()
+        return image
+
+    def test_staged_image_is_hidden_until_published(self):
+        image = self.stage(is_hero=True)
+        client = APIClient()
+
+        self.assertEqual(image.status, "pending")
+        self.assertFalse(image.image)
+        self.assertEqual(client.get(reverse("product-detail", args=[self.product.slug])).data["images"], [])
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.hero_image_id)
+
+        call_command("process_image_uploads", "--once", stdout=StringIO())
+
+        image.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(image.status, "ready")
+        self.assertTrue(image.image.storage.exists(image.image.name))
+        self.assertFalse(image.staged_image)
+        self.assertEqual(set(image.variants), {"thumb", "card", "full"})
+        self.assertEqual(self.product.hero_image_id, image.id)
+
+    @override_settings(IMAGE_UPLOAD_MAX_ATTEMPTS=2)
+    def test_failed_upload_is_retried_then_marked(self):
+        image = self.stage()
+        staged = image.staged_image.storage.open(image.staged_image.name).read()
+        image.staged_image.storage.delete(image.staged_image.name)
+
+        with self.assertLogs("gadjet_shop.services.uploads", "ERROR"):
+            call_command("process_image_uploads", "--once", stdout=StringIO())
+
+        # Back in the queue, but not before its retry delay
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.upload_attempts), ("pending", 1))
+        self.assertGreater(image.retry_at, timezone.now())
+        self.assertFalse(image.image)
+
+        ProductImage.objects.filter(pk=image.pk).update(retry_at=timezone.now())
+        with self.assertLogs("gadjet_shop.services.uploads", "ERROR"):
+            call_command("process_image_uploads", "--once", stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.upload_attempts), ("failed", 2))
+
+        # The staged file is back: requeue it and publish
+        image.staged_image.storage.save(image.staged_image.name, BytesIO(staged))
+        call_command("process_image_uploads", "--once", "--retry-failed", stdout=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(image.status, "ready")
+        self.assertTrue(image.image)
+        self.assertFalse(image.staged_image)
+
+    def claim_then(self, change):
+        claim_uploads = uploads.claim_uploads
+
+        def claim(batch_size):
+            batch = claim_uploads(batch_size)
+            change()
+            return batch
+        return mock.patch("gadjet_shop.services.uploads.claim_uploads", side_effect=claim)
+
+    def test_row_deleted_during_upload_is_skipped(self):
+        image = self.stage()
+        staged = image.staged_image
+
+        with self.claim_then(lambda: ProductImage.objects.filter(pk=image.pk).delete()), \
+                self.assertLogs("gadjet_shop.services.uploads", "WARNING"):
+            self.assertEqual(uploads.publish_pending_uploads(), (0, 0))
+
+        self.assertFalse(staged.storage.exists(staged.name))
+        self.assertEqual(ProductImage.image.field.storage.listdir("products")[1], [])
+
+    def test_reclaimed_row_is_left_to_its_new_worker(self):
+        image = self.stage()
+        lease = timezone.now() + timedelta(hours=1)
+
+        with self.claim_then(lambda: ProductImage.objects.filter(pk=image.pk).update(retry_at=lease)), \
+                self.assertLogs("gadjet_shop.services.uploads", "WARNING"):
+            self.assertEqual(uploads.publish_pending_uploads(), (0, 0))
+
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.retry_at), ("uploading", lease))
+        self.assertTrue(image.staged_image.storage.exists(image.staged_image.name))
+
+    def test_expired_claim_is_picked_up_again(self):
+        image = self.stage()
+        ProductImage.objects.filter(pk=image.pk).update(
+            status="uploading", upload_attempts=1, retry_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        call_command("process_image_uploads", "--once", stdout=StringIO())
+        image.refresh_from_db()
+        self.assertEqual(image.status, "uploading")
+
+        ProductImage.objects.filter(pk=image.pk).update(retry_at=timezone.now())
+        call_command("process_image_uploads", "--once", stdout=StringIO())
+        image.refresh_from_db()
+        self.assertEqual((image.status, image.upload_attempts), ("ready", 2))
+
+    def test_admin_upload_is_staged(self):
+        admin_user = User.objects.create_superuser(email="admin@example.com", password="pass")
+        self.client.force_login(admin_user)
+
+        response = self.client.post(
+            reverse("admin:gadjet_shop_product_change", args=[self.product.pk]),
+            {
+                "name": self.product.name,
+                "slug": self.product.slug,
+                "description": self.product.description,
+                "brand": self.product.brand,
+                "category": self.product.category_id,
+                "price": "100.00",
+                "staff_rating": "0",
+                "stock": "5",
+                "images-TOTAL_FORMS": "1",
+                "images-INITIAL_FORMS": "0",
+                "images-0-image": upload(),
+                "images-0-order": "0",
+                "reviews-TOTAL_FORMS": "0",
+                "reviews-INITIAL_FORMS": "0",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        image = self.product.images.get()
+        self.assertEqual(image.status, "pending")
+        self.assertFalse(image.image)
+        self.assertTrue(image.staged_image.storage.exists(image.staged_image.name))
+
+
+# ------------------------------
+# Bulk catalog import
+# ------------------------------
+class ImportCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        self.path = f"{workdir}/catalog.csv"
+
+    def run_import(self, text, *args):
+        with open(self.path, "w", newline="") as fh:
+            fh.write(text)
+        out, err = StringIO(), StringIO()
+        call_command("import_catalog", self.path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_upserts_by_slug_and_creates_categories(self):
+        category = Category.objects.create(name="Phones")
+        existing = Product.objects.create(
+            name="Old Name", slug="acme-one", description="", brand="Acme",
+            category=category, price=10, stock=1, review_count=3,
+        )
+
+        out, err = self.run_import(
+            "name,slug,brand,category,price,stock\n"
+            "Acme One,acme-one,Acme,Phones,199.99,7\n"
+            "Acme Tab,,Acme,Tablets,299,2\n"
+            "Broken,,Acme,Tablets,free,1\n",
+            "--batch-size", "2",
+        )
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.price, existing.stock), ("Acme One", Decimal("199.99"), 7))
+        self.assertEqual(existing.review_count, 3)
+        tablet = Product.objects.get(slug="acme-tab")
+        self.assertEqual((tablet.category.name, tablet.price), ("Tablets", Decimal("299.00")))
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertIn("Row 3: price must be a number", err)
+        self.assertIn("Imported 2 of 3 row(s)", out)
+
+    def test_derived_slugs_are_stable_across_reimports(self):
+        create_catalog(products=0)
+        Product.objects.create(
+            name="Phone Case", description="", brand="Acme",
+            category=Category.objects.get(), price=5, stock=1,
+        )
+        sheet = (
+            "name,slug,brand,category,price,stock\n"
+            "Phone Case,,Acme,Cases,10,1\n"
+            "Phone Case,,Zed,Cases,12,1\n"
+            "Phone Case,,Acme,Cases,11,1\n"
+            "Charger,acme-charger,Acme,Chargers,20,1\n"
+            "Charger v2,acme-charger,Acme,Chargers,25,1\n"
+        )
+
+        for _ in range(2):
+            out, err = self.run_import(sheet)
+
+            self.assertEqual(
+                sorted(Product.objects.values_list("slug", "price")),
+                [
+                    ("acme-charger", Decimal("20.00")),
+                    ("phone-case", Decimal("10.00")),
+                    ("phone-case-zed", Decimal("12.00")),
+                ],
+            )
+            self.assertIn("Row 3: duplicate of row 1", err)
+            self.assertIn("Row 5: slug 'acme-charger' is already used by row 4", err)
+            self.assertIn("Imported 3 of 5 row(s)", out)
+
+    def test_import_invalidates_catalog_cache(self):
+        create_catalog(products=1, images=0, reviews=0)
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.get(reverse("product-list")).data["count"], 1)
+
+        self.path = self.path.replace(".csv", ".jsonl")
+        self.run_import('{"name": "Acme Watch", "category": "Watches", "price": 50}\n')
+
+        self.assertEqual(client.get(reverse("product-list")).data["count"], 2)
+
+
+# ------------------------------
+# Streaming catalog export
+# ------------------------------
+class ProductExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.products = create_catalog(products=3, images=2, reviews=0)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email="staff@example.com", password="pass", is_staff=True))
+        self.url = reverse("product-export")
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(email="shopper@example.com", password="pass"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_ndjson_reads_in_chunks(self):
+        with mock.patch("gadjet_shop.views.ProductExportView.chunk_size", 2):
+            # One streamed product query plus one image query per chunk
+            with self.assertNumQueries(3):
+                lines = self.export().splitlines()
+
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record["id"] for record in records], [product.id for product in self.products])
+        self.assertTrue(records[0]["image"].startswith("http"))
+        self.assertEqual(len(records[0]["additional_images"]), 1)
+
+    def test_csv_and_merchant_feeds(self):
+        rows = list(csv.DictReader(StringIO(self.export(feed="csv"))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["slug"], self.products[0].slug)
+
+        root = ElementTree.fromstring(self.export(feed="merchant"))
+        items = root.findall("channel/item")
+        self.assertEqual(len(items), 3)
+        ns = {"g": "http://base.google.com/ns/1.0"}
+        self.assertEqual(items[0].find("g:price", ns).text, "100.00 NGN")
+        self.assertEqual(items[0].find("g:availability", ns).text, "in_stock")
+
+    def test_command_writes_file(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+
+        call_command("export_catalog", "--output", f"{workdir}/feed.ndjson", stdout=StringIO())
+
+        with open(f"{workdir}/feed.ndjson") as fh:
+            self.assertEqual(len(fh.readlines()), 3)
+
+
+# ------------------------------
+# Delta sync (?updated_since=)
+# ------------------------------
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.products = create_catalog(products=3, images=1, reviews=0)
+        self.client = APIClient()
+        self.url = reverse("product-list")
+
+    def age(self, products, **delta):
+        Product.objects.filter(id__in=[p.id for p in products]).update(updated_at=timezone.now() - timedelta(**delta))
+
+    def test_returns_changed_and_deleted_products(self):
+        self.age(self.products, hours=2)
+        since = timezone.now() - timedelta(hours=1)
+        changed, deleted = self.products[1], self.products[2]
+        deleted_id = deleted.id
+
+        changed.stock = 0
+        changed.save()
+        deleted.delete()
+
+        data = self.client.get(self.url, {"updated_since": since.isoformat()}).data
+
+        self.assertEqual([row["id"] for row in data["results"]], [changed.id])
+        self.assertEqual([(row["product_id"], row["slug"]) for row in data["deleted"]], [(deleted_id, deleted.slug)])
+        self.assertIsNone(data["next"])
+        self.assertTrue(data["synced_at"])
+
+    def test_pages_share_one_window(self):
+        self.age(self.products, hours=2)
+        since = timezone.now() - timedelta(hours=3)
+
+        with mock.patch("gadjet_shop.pagination.KeysetPagination.page_size", 2):
+            first = self.client.get(self.url, {"updated_since": since.isoformat(), "view": "card"}).data
+            second = self.client.get(first["next"]).data
+
+        self.assertIn("until=", first["next"])
+        self.assertEqual(second["synced_at"], first["synced_at"])
+        ids = [row["id"] for row in first["results"] + second["results"]]
+        self.assertEqual(sorted(ids), sorted(p.id for p in self.products))
+        self.assertEqual(second["deleted"], [])
+
+    def test_rejects_bad_or_expired_timestamps(self):
+        self.assertEqual(self.client.get(self.url, {"updated_since": "yesterday"}).status_code, 400)
+        too_old = timezone.now() - timedelta(days=settings.PRODUCT_TOMBSTONE_RETENTION_DAYS + 1)
+        self.assertEqual(self.client.get(self.url, {"updated_since": too_old.isoformat()}).status_code, 400)
+
+    def test_order_by_created_at(self):
+        response = self.client.get(self.url, {"ordering": "-created_at"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data["results"]], [p.id for p in reversed(self.products)])
+
+
+# ------------------------------
+# Review eligibility (cached purchases)
+# ------------------------------
+class ReviewEligibilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = create_catalog(products=1, images=0, reviews=0)[0]
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.detail_url = reverse("product-detail", args=[self.product.slug])
+        self.create_url = reverse("review-create", args=[self.product.id])
+
+    def buy(self, status="delivered"):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.user, status=status, total_price=self.product.price)
+            OrderItem.objects.create(order=order, product=self.product, quantity=1, price=self.product.price)
+        return order
+
+    def review(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.create_url, {"rating": 4, "comment": "Solid"})
+
+    def test_only_buyers_can_review_once(self):
+        self.assertEqual(self.review().status_code, 400)
+
+        self.buy()
+        self.assertEqual(self.review().status_code, 201)
+        self.assertEqual(Review.objects.get().product, self.product)
+
+        response = self.review()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already reviewed", str(response.data))
+
+    def test_can_review_flag_follows_orders_and_reviews(self):
+        response = self.client.get(self.detail_url)
+        self.assertFalse(response.data["can_review"])
+        etag = response["ETag"]
+
+        order = self.buy()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["can_review"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = "cancelled"
+            order.save()
+        self.assertFalse(self.client.get(self.detail_url).data["can_review"])
+
+    def test_eligibility_check_is_cached(self):
+        self.buy()
+        self.client.get(self.detail_url)
+
+        # ETag validators, product + category, images, reviews + users: no order lookup
+        with self.assertNumQueries(4):
+            response = self.client.get(self.detail_url)
+        self.assertTrue(response.data["can_review"])
+
+
+# ------------------------------
+# Frequently bought together
+# ------------------------------
+class CoPurchaseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        overrides = override_settings(COPURCHASE_STATE_PATH=f"{workdir}/copurchase.npz")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.phone, self.case, self.charger, self.cable = create_catalog(products=4, images=0, reviews=0)
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass")
+        self.client = APIClient()
+
+    def order(self, *products, status="delivered", **fields):
+        order = Order.objects.create(user=self.user, status=status, **fields)
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=order, product=product, quantity=1, price=product.price) for product in products]
+        )
+        return order
+
+    def related(self, product):
+        return [row["id"] for row in self.client.get(reverse("product-related", args=[product.slug])).data]
+
+    def test_ranks_by_shared_orders(self):
+        self.order(self.phone, self.case, self.charger)
+        self.order(self.phone, self.case)
+        self.order(self.phone, self.cable, status="cancelled")
+
+        call_command("build_copurchases", stdout=StringIO())
+
+        self.assertEqual(self.related(self.phone), [self.case.id, self.charger.id])
+        self.assertEqual(self.related(self.charger), [self.phone.id, self.case.id])
+        self.assertEqual(self.related(self.cable), [])
+
+    def test_incremental_run_only_adds_new_orders(self):
+        self.order(self.phone, self.case)
+        call_command("build_copurchases", stdout=StringIO())
+
+        self.order(self.phone, self.charger)
+        self.order(self.phone, self.charger)
+        out = StringIO()
+        call_command("build_copurchases", stdout=out)
+
+        self.assertIn("Folded in 2 order(s)", out.getvalue())
+        self.assertEqual(self.related(self.phone), [self.charger.id, self.case.id])
+        self.assertEqual(self.related(self.case), [self.phone.id])
+
+    def test_late_commit_of_a_lower_id_is_folded_in(self):
+        self.order(self.phone, self.case, id=20)
+        call_command("build_copurchases", stdout=StringIO())
+
+        # Got its id before order 20 but committed after the run
+        self.order(self.phone, self.charger, id=10)
+        out = StringIO()
+        call_command("build_copurchases", stdout=out)
+        self.assertIn("Folded in 1 order(s)", out.getvalue())
+
+        out = StringIO()
+        call_command("build_copurchases", stdout=out)
+        self.assertIn("Folded in 0 order(s)", out.getvalue())
+        self.assertEqual(sorted(self.related(self.phone)), sorted([self.case.id, self.charger.id]))
+
+    def test_settled_orders_are_forgotten(self):
+        old = self.order(self.phone, self.case)
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        recent = self.order(self.phone, self.charger)
+        call_command("build_copurchases", stdout=StringIO())
+
+        matrix = CoPurchaseMatrix.load()
+        self.assertEqual(matrix.last_order_id, old.id)
+        self.assertEqual(matrix.recent_order_ids, {recent.id})
+
+    def test_endpoint_is_one_query(self):
+        self.order(self.phone, self.case, self.charger)
+        call_command("build_copurchases", stdout=StringIO())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.related(self.phone)), 2)
+        self.assertEqual(self.client.get(reverse("product-related", args=["missing"])).status_code, 404)
+
+
+# ------------------------------
+# Bestseller / trending rankings
+# ------------------------------
+class SalesRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.phone, self.case, self.charger = create_catalog(products=3, images=0, reviews=0)
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, *lines):
+        response = self.client.post(
+            reverse("create-order"),
+            {"items": [{"product_id": product.id, "quantity": quantity} for product, quantity in lines]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def ranking(self, ordering, client=None):
+        client = client or self.client
+        response = client.get(reverse("product-list"), {"ordering": ordering, "view": "card"})
+        return [row["id"] for row in response.data["results"]]
+
+    def test_checkout_and_cancel_update_rankings(self):
+        self.checkout((self.case, 3), (self.phone, 1))
+        order_id = self.checkout((self.charger, 5))
+
+        self.assertEqual(self.ranking("bestselling"), [self.charger.id, self.case.id, self.phone.id])
+        self.assertEqual(
+            ProductDailySales.objects.get(product=self.case, day=timezone.localdate()).units, 3
+        )
+
+        self.client.post(reverse("cancel-order", args=[order_id]))
+
+        self.assertEqual(self.ranking("trending"), [self.case.id, self.phone.id, self.charger.id])
+        self.charger.refresh_from_db()
+        self.assertEqual((self.charger.bestseller_units, self.charger.trending_score), (0, 0))
+
+    def test_admin_status_changes_update_cached_rankings(self):
+        self.checkout((self.case, 3))
+        order_id = self.checkout((self.charger, 5))
+        admin = APIClient()
+        admin.force_authenticate(User.objects.create_user(email="admin@example.com", password="pass", is_staff=True))
+        url = reverse("update-order-status", args=[order_id])
+        # Anonymous responses are the cached ones
+        anonymous = APIClient()
+        self.assertEqual(self.ranking("bestselling", anonymous)[0], self.charger.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.patch(url, {"status": "cancelled"}, format="json")
+        self.assertEqual(self.ranking("bestselling", anonymous)[0], self.case.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.patch(url, {"status": "processing"}, format="json")
+        self.assertEqual(self.ranking("bestselling", anonymous)[0], self.charger.id)
+        self.assertEqual(
+            ProductDailySales.objects.get(product=self.charger, day=timezone.localdate()).units, 5
+        )
+
+    def test_refresh_decays_and_drops_old_sales(self):
+        today = timezone.localdate()
+        ProductDailySales.objects.create(product=self.phone, day=today - timedelta(days=30), units=50)
+        ProductDailySales.objects.create(product=self.case, day=today - timedelta(days=3), units=4)
+        ProductDailySales.objects.create(product=self.charger, day=today, units=3)
+
+        call_command("refresh_sales_rankings", stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(self.ranking("trending"), [self.charger.id, self.case.id, self.phone.id])
+        self.case.refresh_from_db()
+        self.assertEqual(self.case.bestseller_units, 4)
+        self.assertAlmostEqual(self.case.trending_score, 2.0)
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.bestseller_units, 0)
@@ -1,7 +1,10 @@
 from django.urls import path
 from .views import (
     ProductListAPIView,
+    ProductFacetsAPIView,
+    ProductExportView,
     ProductDetailAPIView,
+    RelatedProductsAPIView,
     ReviewListAPIView,
     ReviewCreateAPIView,
 )
@@ -9,7 +12,10 @@ from .views import (
 urlpatterns = [
     # Product endpoints
     path('products/', ProductListAPIView.as_view(), name='product-list'),
+    path('products/facets/', ProductFacetsAPIView.as_view(), name='product-facets'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
     path('products/<slug:slug>/', ProductDetailAPIView.as_view(), name='product-detail'),
+    path('products/<slug:slug>/related/', RelatedProductsAPIView.as_view(), name='product-related'),
 
     # Review endpoints
     path('products/<int:product_id>/reviews/', ReviewListAPIView.as_view(), name='review-list'),
@@ -1,34 +1,198 @@
 from rest_framework import generics, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.utils.urls import replace_query_param
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
-from .models import Product, Review
-from .serializers import ProductSerializer, ReviewSerializer
+from .models import Product, ProductCoPurchase, ProductImage, ProductTombstone, Review
+from .serializers import ProductSerializer, ProductCardSerializer, ReviewSerializer
+from .pagination import ProductDeltaPagination, ProductKeysetPagination, ReviewKeysetPagination
+from .search import search_products
+from .facets import compute_product_facets
+from .cache import CatalogResponseCacheMixin, catalog_cache_key, catalog_cache_timeout
+from .conditional import ConditionalGetMixin, make_etag
+from .feeds import FEED_FORMATS, stream_feed
+from .services.purchases import eligibility_version
+
+
+# Newest approved reviews embedded in product responses; the rest are
+# paged through ReviewListAPIView
+EMBEDDED_REVIEWS = 5
+
+
+def product_queryset():
+    """
+    Products with everything ProductSerializer reads loaded up front,
+    so a page costs a fixed number of queries.
+    """
+    # Sliced prefetch: one windowed query keeps the newest N per product
+    recent_reviews = (
+        Review.objects
+        .filter(is_approved=True)
+        .select_related("user")
+        .prefetch_related("images")
+        .order_by("-created_at", "-id")[:EMBEDDED_REVIEWS]
+    )
+    return (
+        Product.objects
+        .select_related("category")
+        .prefetch_related(
+            # Pending uploads have no public file yet
+            Prefetch("images", queryset=ProductImage.objects.filter(status="ready")),
+            Prefetch("reviews", queryset=recent_reviews, to_attr="recent_reviews"),
+        )
+    )
+
+
+# Rows written by transactions still open when a sync ran can carry an
+# earlier updated_at than its synced_at; re-sending that window catches them
+DELTA_SYNC_OVERLAP = timedelta(seconds=30)
+
+
+def parse_sync_timestamp(value, param):
+    # A raw "+00:00" in a query string arrives as " 00:00"
+    try:
+        parsed = parse_datetime(value.replace(" ", "+"))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({param: "Expected an ISO 8601 timestamp."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+class ProductFilterMixin:
+    """Catalog filters shared by the product list and facet endpoints."""
+    filterset_fields = {
+        "category__name": ["exact", "icontains"],
+        "brand": ["exact", "icontains"],
+    }
+
+    def filter_products(self, queryset):
+        is_hero = self.request.query_params.get("is_hero")
+        if is_hero == "true":
+            queryset = queryset.filter(has_hero=True)
+        search = self.request.query_params.get("q", "").strip()
+        if search:
+            queryset = search_products(queryset, search)
+        return queryset
 
 
 # ----------------------------------
 # PUBLIC: List all products
+# ?view=card returns the compact card representation
+# ?pagination=cursor switches to keyset pagination
+# ?q= full-text search, ranked unless ?ordering= is given
+# ?updated_since= delta sync: changed products plus deleted ones
+# ?ordering=bestselling / trending ranks by the sales read model
+# Anonymous responses are cached per catalog generation
 # ----------------------------------
-class ProductListAPIView(generics.ListAPIView):
+class ProductListAPIView(CatalogResponseCacheMixin, ProductFilterMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = {
-        "category__name": ["exact", "icontains"],
-        "brand": ["exact", "icontains"],
-    }
     ordering_fields = ["price", "rating", "created_at"]
     ordering = ["price"]
+    # Named rankings, highest first, kept up to date by gadjet_shop.services.sales
+    rankings = {
+        "bestselling": ("-bestseller_units", "-id"),
+        "trending": ("-trending_score", "-id"),
+    }
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.is_delta_sync():
+                self._paginator = ProductDeltaPagination()
+            elif ProductKeysetPagination.is_requested(self.request):
+                self._paginator = ProductKeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def is_card_view(self):
+        return self.request.query_params.get("view") == "card"
+
+    def is_delta_sync(self):
+        return "updated_since" in self.request.query_params
+
+    def get_serializer_class(self):
+        if self.is_card_view():
+            return ProductCardSerializer
+        return ProductSerializer
+
+    def get_base_queryset(self):
+        if self.is_card_view():
+            return Product.objects.select_related("hero_image")
+        return product_queryset()
 
     def get_queryset(self):
-        queryset = Product.objects.all()
-        is_hero = self.request.query_params.get("is_hero")
-        if is_hero == "true":
-            queryset = queryset.filter(images__is_hero=True).distinct()
+        return self.filter_products(self.get_base_queryset())
+
+    def list(self, request, *args, **kwargs):
+        if self.is_delta_sync():
+            return self.delta_sync(request)
+        return super().list(request, *args, **kwargs)
+
+    def delta_sync(self, request):
+        """
+        Products changed in (updated_since, until] oldest first, keyset
+        paginated, plus the products deleted in that window (first page
+        only). Filters and ?ordering= do not apply. Clients store
+        `synced_at` and send it as the next `updated_since`; `until` pins
+        the window across pages and is carried in the `next` links.
+        """
+        params = request.query_params
+        now = timezone.now()
+        since = parse_sync_timestamp(params["updated_since"], "updated_since")
+        until = min(parse_sync_timestamp(params["until"], "until"), now) if "until" in params else now
+
+        if since < now - timedelta(days=settings.PRODUCT_TOMBSTONE_RETENTION_DAYS):
+            raise ValidationError({"updated_since": "Older than the deletion history; resync the full catalog."})
+        since -= DELTA_SYNC_OVERLAP
+
+        queryset = (
+            self.get_base_queryset()
+            .filter(updated_at__gt=since, updated_at__lte=until)
+            .order_by("updated_at", "id")
+        )
+        page = self.paginate_queryset(queryset)
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        if response.data["next"]:
+            response.data["next"] = replace_query_param(response.data["next"], "until", until.isoformat())
+        deleted = []
+        if "cursor" not in params:
+            deleted = list(
+                ProductTombstone.objects
+                .filter(deleted_at__gt=since, deleted_at__lte=until)
+                .order_by("deleted_at", "id")
+                .values("product_id", "slug", "deleted_at")
+            )
+        response.data["deleted"] = deleted
+        response.data["synced_at"] = until.isoformat()
+        return response
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        ranking = self.rankings.get(self.request.query_params.get("ordering"))
+        if ranking:
+            return queryset.order_by(*ranking)
+        # Best matches first when searching without an explicit ordering
+        if "search_rank" in queryset.query.annotations and not self.request.query_params.get("ordering"):
+            queryset = queryset.order_by("-search_rank", "id")
         return queryset
 
     def get_serializer_context(self):
@@ -38,14 +202,81 @@ class ProductListAPIView(generics.ListAPIView):
 
 
 # ----------------------------------
-# PUBLIC: Product detail by slug
+# PUBLIC: Facet counts for the current filters
+# ----------------------------------
+class ProductFacetsAPIView(ProductFilterMixin, generics.GenericAPIView):
+    permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend]
+
+    # Params that change list presentation but not the matching set
+    ignored_params = ("ordering", "page", "cursor", "pagination", "view")
+
+    def get_queryset(self):
+        return self.filter_products(Product.objects.all())
+
+    def get(self, request):
+        key = catalog_cache_key("facets", request.query_params, ignore=self.ignored_params)
+        facets = cache.get(key)
+        if facets is None:
+            facets = compute_product_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, facets, catalog_cache_timeout())
+        return Response(facets, status=status.HTTP_200_OK)
+
+
+# ----------------------------------
+# STAFF: Whole-catalog export for partners / the search indexer
 # ----------------------------------
-class ProductDetailAPIView(generics.RetrieveAPIView):
-    queryset = Product.objects.all()
+class ProductExportView(APIView):
+    """
+    Streams every product as ?feed=ndjson (default), csv or merchant
+    (Google Merchant XML). Rows are read in chunks and written as they are
+    rendered, so memory stays flat however large the catalog is.
+    """
+    permission_classes = [IsAdminUser]
+    chunk_size = 1000
+
+    def get(self, request):
+        feed = request.query_params.get("feed", "ndjson")
+        if feed not in FEED_FORMATS:
+            raise ValidationError({"feed": f"Choose one of: {', '.join(FEED_FORMATS)}."})
+
+        content_type, extension = FEED_FORMATS[feed]
+        response = StreamingHttpResponse(
+            stream_feed(feed, request.build_absolute_uri, self.chunk_size),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="catalog.{extension}"'
+        return response
+
+
+# ----------------------------------
+# PUBLIC: Product detail by slug (cached like the list, supports ETags)
+# ----------------------------------
+class ProductDetailAPIView(CatalogResponseCacheMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     serializer_class = ProductSerializer
     lookup_field = "slug"
     permission_classes = [AllowAny]
 
+    def get_queryset(self):
+        return product_queryset()
+
+    def get_validators(self, request, slug):
+        row = (
+            Product.objects.filter(slug=slug)
+            .values_list("id", "updated_at", "review_count", "rating", "reserved_stock")
+            .first()
+        )
+        if row is None:
+            return None
+        product_id, updated_at, review_count, rating, reserved_stock = row
+        # can_review is per user: its cache version keeps ETags apart
+        viewer = eligibility_version(request.user.id) if request.user.is_authenticated else "anonymous"
+        # Cart holds change the published stock without touching updated_at
+        etag = make_etag(
+            "product", product_id, updated_at.isoformat(), review_count, rating, reserved_stock, viewer
+        )
+        return etag, updated_at
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context["request"] = self.request
@@ -53,11 +284,46 @@ class ProductDetailAPIView(generics.RetrieveAPIView):
 
 
 # ----------------------------------
-# PUBLIC: List approved reviews for a product
+# PUBLIC: "Frequently bought together" (precomputed by build_copurchases)
+# ----------------------------------
+class RelatedProductsAPIView(generics.GenericAPIView):
+    serializer_class = ProductCardSerializer
+    permission_classes = [AllowAny]
+
+    def get(self, request, slug):
+        # One indexed read: the product's top-K rows joined to the related cards
+        entries = (
+            ProductCoPurchase.objects
+            .filter(product__slug=slug, related__stock__gt=F("related__reserved_stock"))
+            .select_related("related__hero_image")
+            .order_by("rank")
+        )
+        products = [entry.related for entry in entries]
+        if not products and not Product.objects.filter(slug=slug).exists():
+            raise NotFound("Product not found.")
+        return Response(self.get_serializer(products, many=True).data, status=status.HTTP_200_OK)
+
+
+# ----------------------------------
+# PUBLIC: List approved reviews for a product (supports ETags)
 # ----------------------------------
-class ReviewListAPIView(generics.ListAPIView):
+class ReviewListAPIView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [AllowAny]
+    pagination_class = ReviewKeysetPagination
+
+    def get_validators(self, request, product_id):
+        # Approved review changes bump the product's updated_at and aggregates
+        row = (
+            Product.objects.filter(pk=product_id)
+            .values_list("updated_at", "review_count")
+            .first()
+        )
+        if row is None:
+            return None
+        updated_at, review_count = row
+        etag = make_etag("reviews", request.get_full_path(), updated_at.isoformat(), review_count)
+        return etag, updated_at
 
     def get_queryset(self):
         product_id = self.kwargs.get("product_id")
@@ -65,7 +331,8 @@ class ReviewListAPIView(generics.ListAPIView):
             Review.objects
             .filter(product_id=product_id, is_approved=True)
             .select_related("user")
-            .order_by("-created_at")  # newest first
+            .prefetch_related("images")
+            .order_by("-created_at", "-id")  # newest first
         )
 
     def get_serializer_context(self):
@@ -81,19 +348,24 @@ class ReviewCreateAPIView(generics.CreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
 
-    def perform_create(self, serializer):
-        from .models import Product  # ensure we get the product instance
-        product_id = self.kwargs.get("product_id")
+    def get_product(self):
+        if not hasattr(self, "_product"):
+            try:
+                self._product = Product.objects.get(id=self.kwargs.get("product_id"))
+            except Product.DoesNotExist:
+                raise ValidationError({"product": "Product not found."})
+        return self._product
 
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            raise ValidationError({"product": "Product not found."})
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["product"] = self.get_product()
+        return context
 
+    def perform_create(self, serializer):
         # The buyer-only check is handled in the serializer's validate() method
         serializer.save(
             user=self.request.user,
-            product=product,
+            product=self.get_product(),
             is_approved=False  # pending admin approval
         )
 
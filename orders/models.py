@@ -25,6 +25,12 @@ class Order(models.Model):
 
     total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    class Meta:
+        indexes = [
+            # UserOrdersView: a user's orders, newest first
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.id} ({self.user.email}) - {self.status}"
 
@@ -35,5 +41,11 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)  # price at order time
 
+    class Meta:
+        indexes = [
+            # Buyer check in ReviewSerializer.validate: product first, then join to the order
+            models.Index(fields=["product", "order"], name="orderitem_product_order_idx"),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name} for Order {self.order.id}"
@@ -2,7 +2,12 @@ from rest_framework import serializers
 from django.db import transaction
 from django.utils import timezone
 from .models import Order, OrderItem
+from gadjet_shop.cache import bump_catalog_version
 from gadjet_shop.models import Product, Review
+from gadjet_shop.services.sales import record_sales
+from cart.owners import CartOwner
+from cart.services.reservations import available_to, consume_holds, held_quantities
+from cart.stores import cart_store
 
 
 # ------------------------------
@@ -34,7 +39,7 @@ class ProductSummarySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "price", "slug", "images", "reviews"]
 
     def get_images(self, obj):
-        return [{"image": img.image.url} for img in obj.images.all()]
+        return [{"image": img.image.url} for img in obj.images.filter(status="ready")]
 
     def get_reviews(self, obj):
         reviews = obj.reviews.filter(is_approved=True).select_related("user")
@@ -103,22 +108,31 @@ class OrderCreateSerializer(serializers.Serializer):
         total_price = 0
         order_items = []
 
+        # Persist a write-behind cart before it becomes an order
+        owner = CartOwner.for_user(user)
+        cart_store.flush(owner)
+
         with transaction.atomic():
             product_ids = [item["product_id"] for item in items_data]
-            products = Product.objects.select_for_update().filter(id__in=product_ids)
-            products_map = {p.id: p for p in products}
+            # The buyer's own cart holds count towards what they can buy
+            held = held_quantities(owner.key, product_ids)
+            products_map = Product.objects.in_bulk(product_ids)
 
+            requested = {}
             for item in items_data:
                 product = products_map.get(item["product_id"])
                 if not product:
                     raise serializers.ValidationError(f"Product with id {item['product_id']} not found.")
-                if item["quantity"] > product.stock:
+                requested[product.id] = requested.get(product.id, 0) + item["quantity"]
+                if requested[product.id] > available_to(product, held.get(product.id, 0)):
                     raise serializers.ValidationError(f"Not enough stock for {product.name}.")
 
-                # Deduct stock
-                product.stock -= item["quantity"]
-                product.save()
-
+            # Holds become the sale; stock is deducted by a conditional UPDATE
+            short = consume_holds(owner.key, held, requested)
+            if short:
+                raise serializers.ValidationError(f"Not enough stock for {products_map[short[0]].name}.")
+            for item in items_data:
+                product = products_map[item["product_id"]]
                 total_price += product.price * item["quantity"]
                 order_items.append(OrderItem(product=product, quantity=item["quantity"], price=product.price))
 
@@ -127,6 +141,7 @@ class OrderCreateSerializer(serializers.Serializer):
             for oi in order_items:
                 oi.order = order
             OrderItem.objects.bulk_create(order_items)
+            record_sales((oi.product_id, oi.quantity, oi.price) for oi in order_items)
 
         return order
 
@@ -158,10 +173,17 @@ class CancelOrderSerializer(serializers.Serializer):
             order.save()
 
             # Rollback stock
-            for item in order.items.select_related("product"):
+            items = list(order.items.select_related("product"))
+            for item in items:
                 product = item.product
                 product.stock += item.quantity
-                product.save()
+                product.save(update_fields=["stock", "updated_at"])
+
+            record_sales(
+                [(item.product_id, item.quantity, item.price) for item in items],
+                day=timezone.localdate(order.created_at),
+                sign=-1,
+            )
 
         return order
 
@@ -179,6 +201,7 @@ class UpdateOrderStatusSerializer(serializers.Serializer):
 
         with transaction.atomic():
             order = Order.objects.select_for_update().get(id=order_id)
+            was_cancelled = order.status == "cancelled"
             order.status = new_status
             now = timezone.now()
 
@@ -192,4 +215,14 @@ class UpdateOrderStatusSerializer(serializers.Serializer):
                 order.cancelled_at = now
 
             order.save()
+
+            # Cancelled orders don't count towards sales rankings
+            if was_cancelled != (new_status == "cancelled"):
+                record_sales(
+                    order.items.values_list("product_id", "quantity", "price"),
+                    day=timezone.localdate(order.created_at),
+                    sign=-1 if new_status == "cancelled" else 1,
+                )
+                # The ranking columns are written with update(), which sends no signals
+                transaction.on_commit(bump_catalog_version)
         return order
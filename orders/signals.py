@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gadjet_shop.services.purchases import invalidate_review_eligibility
+
+from .models import Order
+
+
+# ------------------------------
+# Cached review eligibility follows orders
+# (order items are only written alongside a saved Order, and the
+# invalidation runs after that transaction commits; the Review side is in
+# gadjet_shop.signals)
+# ------------------------------
+def _invalidate_after_commit(user_id):
+    # After commit, so a concurrent miss cannot cache the old rows under the new version
+    if user_id:
+        transaction.on_commit(lambda: invalidate_review_eligibility(user_id))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_eligibility(sender, instance, **kwargs):
+    _invalidate_after_commit(instance.user_id)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_composite_query_indexes'),
+        ('payments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ),
+    ]
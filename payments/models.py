@@ -36,5 +36,11 @@ class Payment(models.Model):
     verified_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Reconciliation: payments in a given state by age
+            models.Index(fields=["status", "created_at"], name="payment_status_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.reference} - {self.status}"
@@ -13,6 +13,9 @@ from gadjet_shop.models import Product
 from payments.models import Payment
 from payments.serializers import PaystackVerifySerializer
 from payments.services.paystack import verify_paystack_payment, verify_webhook_signature
+from gadjet_shop.services.sales import record_sales
+from cart.owners import CartOwner
+from cart.services.reservations import available_to, consume_holds, held_quantities
 
 
 class PaystackVerifyView(APIView):
@@ -65,14 +68,14 @@ class PaystackVerifyView(APIView):
             order_total = 0
             out_of_stock_items = []
 
-            # Lock product rows
-            products_map = {
-                p.id: p for p in Product.objects.select_for_update().filter(
-                    id__in=[item["product_id"] for item in items]
-                )
-            }
+            product_ids = [item["product_id"] for item in items]
+            # The buyer's own cart holds count towards what they can buy
+            owner_key = CartOwner.for_user(request.user).key
+            held = held_quantities(owner_key, product_ids)
+            products_map = Product.objects.in_bulk(product_ids)
 
             # Validate stock
+            requested = {}
             for item in items:
                 product = products_map.get(item["product_id"])
                 quantity = int(item["quantity"])
@@ -89,14 +92,28 @@ class PaystackVerifyView(APIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-                if product.stock < quantity:
+                requested[product.id] = requested.get(product.id, 0) + quantity
+                available = available_to(product, held.get(product.id, 0))
+                if available < requested[product.id]:
                     out_of_stock_items.append({
                         "product_id": product.id,
                         "product_name": product.name,
-                        "available_stock": product.stock,
+                        "available_stock": available,
                         "requested_quantity": quantity,
                     })
 
+            # Holds become the sale; stock is deducted by a conditional UPDATE
+            if not out_of_stock_items:
+                out_of_stock_items = [
+                    {
+                        "product_id": product.id,
+                        "product_name": product.name,
+                        "available_stock": available_to(product, held.get(product.id, 0)),
+                        "requested_quantity": requested[product.id],
+                    }
+                    for product in Product.objects.filter(pk__in=consume_holds(owner_key, held, requested))
+                ]
+
             if out_of_stock_items:
                 return Response(
                     {
@@ -114,14 +131,12 @@ class PaystackVerifyView(APIView):
                 total_price=0,
             )
 
-            # Deduct stock and create order items
+            # Create order items
+            sold = []
             for item in items:
                 product = products_map[item["product_id"]]
                 quantity = int(item["quantity"])
 
-                product.stock -= quantity
-                product.save(update_fields=["stock"])
-
                 OrderItem.objects.create(
                     order=order,
                     product=product,
@@ -130,6 +145,7 @@ class PaystackVerifyView(APIView):
                 )
 
                 order_total += product.price * quantity
+                sold.append((product.id, quantity, product.price))
 
             # Record payment
             payment = Payment.objects.create(
@@ -157,6 +173,7 @@ class PaystackVerifyView(APIView):
 
             order.total_price = order_total
             order.save(update_fields=["total_price"])
+            record_sales(sold)
 
         return Response(
             {